@@ -4,6 +4,10 @@ from flask_cors import CORS, cross_origin
 from werkzeug.security import generate_password_hash, check_password_hash
 from decouple import config
 from flasgger import Swagger  # Agrega la importación de Flasgger
+from json_provider import OrjsonProvider
+from services import db_routing
+from services import load_shedding
+from services import rate_limit
 import os
 
 app = Flask(__name__)
@@ -11,14 +15,22 @@ app = Flask(__name__)
 cors = CORS(app)
 app.config['CORS_HEADERS'] = 'Content-Type'
 
+app.json = OrjsonProvider(app)
 app.json.sort_keys = False
 app.config['SQLALCHEMY_DATABASE_URI'] = config('SQLALCHEMY_DATABASE_URI')
 SECRET_KEY = config('SECRET_KEY')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = load_shedding.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
 
 swagger = Swagger(app)
 
-db = SQLAlchemy(app)
+# Las lecturas de peticiones GET pueden ir a réplicas, ver services/db_routing.py
+db = SQLAlchemy(app, session_options={"class_": db_routing.RoutingSession})
+db_routing.init_app(app)
+
+# Protección de los endpoints públicos, ver services/load_shedding.py y services/rate_limit.py
+load_shedding.init_app(app)
+rate_limit.init_app(app)
 
 # Importa las rutas de usuario
 from routes.user import user_bp
@@ -44,6 +56,12 @@ from routes.category import category_bp
 # Importa la ruta de mac_address
 from routes.mac_address import mac_address_bp
 
+# Importa la ruta de sync
+from routes.sync import sync_bp
+
+# Importa la ruta de health
+from routes.health import health_bp
+
 
 # Registra las rutas de usuario
 app.register_blueprint(user_bp, url_prefix='/user')
@@ -54,6 +72,15 @@ app.register_blueprint(material_bp, url_prefix='/material')
 app.register_blueprint(attraction_bp, url_prefix='/attraction')
 app.register_blueprint(category_bp, url_prefix='/category')
 app.register_blueprint(mac_address_bp, url_prefix='/mac_address')
+app.register_blueprint(sync_bp, url_prefix='/sync')
+app.register_blueprint(health_bp, url_prefix='/health')
+
+# Precalentamiento de las caches del catálogo, ver services/warmup.py
+from services import warmup
+warmup.init_app(app)
+
+# Registra los comandos de la CLI de Flask
+import commands
 
 
 
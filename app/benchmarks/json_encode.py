@@ -0,0 +1,81 @@
+"""Compara el costo de codificar el catálogo con el proveedor JSON estándar
+y con OrjsonProvider.
+
+Uso (desde app/):
+
+    python -m benchmarks.json_encode [--attractions 5000] [--repeat 20]
+"""
+import argparse
+import datetime
+import decimal
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from json_provider import OrjsonProvider, orjson
+
+
+def build_payload(count):
+    """Genera una respuesta con la forma de get_all_attractions."""
+    payload = []
+    for i in range(count):
+        payload.append({
+            "id": i,
+            "name": "Atracción {}".format(i),
+            "lat": 19.43 + i * 1e-5,
+            "lng": -99.13 - i * 1e-5,
+            "description": "Escultura en bronce del campus, técnica de fundición. " * 4,
+            "img": [{"url": "https://cdn.example.com/img/{}/{}.jpg".format(i, n)} for n in range(4)],
+            "size": i % 300,
+            "author": {
+                "id": i % 50,
+                "name": "Autor {}".format(i % 50),
+                "birthday": datetime.date(1950, 1, 1) + datetime.timedelta(days=i % 9000),
+                "death": None,
+            },
+            "style": {"id": i % 10, "name": "Estilo {}".format(i % 10)},
+            "userName": "admin",
+            "category": {"id": i % 8, "name": "Categoría {}".format(i % 8)},
+            "materials": [{"id": 1, "material_name": "Bronce"}, {"id": 2, "material_name": "Mármol"}],
+            "tecnicas": [{"id": 1, "tecnique_name": "Fundición"}],
+            "price": decimal.Decimal("12.50"),
+        })
+    return payload
+
+
+def measure(provider, payload, repeat):
+    seconds = min(timeit.repeat(lambda: provider.dumps(payload), number=1, repeat=repeat))
+    tracemalloc.start()
+    provider.dumps(payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attractions", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask("benchmark")
+    payload = build_payload(args.attractions)
+    providers = [("stdlib", DefaultJSONProvider(app)), ("orjson", OrjsonProvider(app))]
+    if orjson is None:
+        print("orjson no está instalado: OrjsonProvider usa el json estándar.")
+
+    print("{:<9} {:>12} {:>18}".format("proveedor", "tiempo (ms)", "memoria pico (KiB)"))
+    for name, provider in providers:
+        provider.sort_keys = False
+        seconds, peak = measure(provider, payload, args.repeat)
+        print("{:<9} {:>12.2f} {:>18.0f}".format(name, seconds * 1000, peak / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+
+import click
+
+from app import app, db
+from services import catalog_snapshot
+from services import images
+from services import bundle
+from services import cache_versions
+from services import change_log
+from services import coordinates
+
+
+@app.cli.command("build-catalog-snapshot")
+@click.argument("path", required=False)
+def build_catalog_snapshot(path):
+    """Genera el snapshot del catálogo para los workers de solo lectura."""
+    path = path or catalog_snapshot.SNAPSHOT_PATH
+    if not path:
+        raise click.UsageError("Indica la ruta o configura CATALOG_SNAPSHOT_PATH.")
+    attractions, categories, strings = catalog_snapshot.build_snapshot(path)
+    click.echo(
+        "Snapshot generado en {}: {} atracciones, {} categorías, {} cadenas.".format(
+            path, attractions, categories, strings
+        )
+    )
+
+
+@app.cli.command("build-thumbnails")
+@click.option("--force", is_flag=True, help="Vuelve a procesar imágenes ya registradas.")
+def build_thumbnails(force):
+    """Genera el manifiesto y las miniaturas de las imágenes de atracciones."""
+    from models.attraction import Attraction
+
+    processed = 0
+    for attraction in Attraction.query.filter(Attraction.is_delete == 0).all():
+        try:
+            processed += images.build_manifest(attraction, force=force)
+        except Exception as e:
+            db.session.rollback()
+            click.echo("Error con la atracción {}: {}".format(attraction.id, e), err=True)
+    click.echo("Imágenes procesadas: {}.".format(processed))
+
+
+@app.cli.command("export-bundle")
+@click.argument("path", required=False)
+def export_bundle(path):
+    """Genera el paquete SQLite comprimido del catálogo para uso sin conexión."""
+    path = os.path.abspath(path) if path else bundle.BUNDLE_PATH
+    version, attractions = bundle.export_bundle(path)
+    click.echo("Paquete generado en {}: versión {}, {} atracciones.".format(path, version, attractions))
+
+
+@app.cli.command("check-coordinates")
+@click.option("--fix", is_flag=True, help="Invierte lat y lng cuando corresponde y actualiza is_geolocated.")
+def check_coordinates(fix):
+    """Revisa las coordenadas de todas las atracciones y reporta las inválidas."""
+    from models.attraction import Attraction
+
+    counts = {"ok": 0, "swapped": 0, "invalid": 0}
+    changed = 0
+    for attraction in Attraction.query.order_by(Attraction.id).all():
+        status, result = coordinates.check(attraction.lat, attraction.lng)
+        counts[status] += 1
+        if status == "swapped":
+            click.echo("Atracción {} ({}): lat y lng invertidas ({}, {})".format(
+                attraction.id, attraction.name, attraction.lat, attraction.lng
+            ))
+        elif status == "invalid":
+            click.echo("Atracción {} ({}): {}".format(attraction.id, attraction.name, result))
+
+        if not fix:
+            continue
+        is_geolocated = status != "invalid"
+        if status == "swapped":
+            attraction.lat, attraction.lng = result
+            # Las apps sin conexión deben recibir las coordenadas corregidas
+            change_log.record("attraction", attraction, "update")
+        if status == "swapped" or bool(attraction.is_geolocated) != is_geolocated:
+            attraction.is_geolocated = is_geolocated
+            changed += 1
+
+    if changed:
+        db.session.commit()
+        cache_versions.bump("attraction")
+    click.echo("Correctas: {}, invertidas: {}, inválidas: {}.".format(
+        counts["ok"], counts["swapped"], counts["invalid"]
+    ))
+    if fix:
+        click.echo("Atracciones actualizadas: {}.".format(changed))
@@ -0,0 +1,5 @@
+-- Tabla de versiones usada para invalidar las caches en memoria entre workers.
+CREATE TABLE IF NOT EXISTS cache_version (
+    name VARCHAR(60) NOT NULL PRIMARY KEY,
+    version INT NOT NULL DEFAULT 0
+);
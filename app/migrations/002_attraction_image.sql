@@ -0,0 +1,12 @@
+-- Manifiesto normalizado de las imágenes de cada atracción y su miniatura.
+CREATE TABLE IF NOT EXISTS attraction_image (
+    id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    id_attraction INT,
+    url VARCHAR(1024) NOT NULL,
+    width INT,
+    height INT,
+    byte_size INT,
+    content_hash VARCHAR(64),
+    thumbnail VARCHAR(255),
+    INDEX ix_attraction_image_id_attraction (id_attraction)
+);
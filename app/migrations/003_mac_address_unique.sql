@@ -0,0 +1,3 @@
+-- Índice único sobre la MAC para las búsquedas de beacons.
+-- Antes de aplicarlo hay que eliminar las direcciones duplicadas.
+ALTER TABLE mac_address ADD UNIQUE INDEX ux_mac_address_address (address);
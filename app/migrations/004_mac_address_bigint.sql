@@ -0,0 +1,43 @@
+-- Guarda las MAC como entero canónico de 48 bits en lugar de texto.
+-- Acepta los formatos AA:BB:CC:DD:EE:FF, aa-bb-cc-dd-ee-ff, aabb.ccdd.eeff y aabbccddeeff,
+-- con espacios, tabuladores o saltos de línea sobrantes.
+CREATE TEMPORARY TABLE mac_address_normalized AS
+SELECT id, address,
+    UPPER(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(
+        address, ':', ''), '-', ''), '.', ''), ' ', ''), '\t', ''), '\r', ''), '\n', '')) AS digits
+FROM mac_address;
+
+-- Las filas que aparezcan aquí no son MAC válidas o quedarían duplicadas;
+-- deben corregirse o eliminarse antes de volver a correr este script.
+SELECT id, address FROM mac_address_normalized
+WHERE digits IS NULL OR NOT digits REGEXP '^[0-9A-F]{12}$';
+SELECT digits, COUNT(*) FROM mac_address_normalized GROUP BY digits HAVING COUNT(*) > 1;
+
+-- Si hay filas así, el CHECK falla y el script se detiene antes de tocar la tabla
+CREATE TEMPORARY TABLE mac_address_precheck (
+    problem VARCHAR(20) NOT NULL,
+    row_count INT NOT NULL,
+    CONSTRAINT mac_address_rows_must_be_fixed CHECK (row_count = 0)
+);
+INSERT INTO mac_address_precheck
+SELECT 'invalid', COUNT(*) FROM mac_address_normalized
+WHERE digits IS NULL OR NOT digits REGEXP '^[0-9A-F]{12}$';
+INSERT INTO mac_address_precheck
+SELECT 'duplicate', COUNT(*) FROM (
+    SELECT digits FROM mac_address_normalized GROUP BY digits HAVING COUNT(*) > 1
+) AS duplicates;
+DROP TEMPORARY TABLE mac_address_precheck;
+
+ALTER TABLE mac_address ADD COLUMN address_int BIGINT NULL;
+
+UPDATE mac_address
+JOIN mac_address_normalized ON mac_address_normalized.id = mac_address.id
+SET mac_address.address_int = CONV(mac_address_normalized.digits, 16, 10);
+
+DROP TEMPORARY TABLE mac_address_normalized;
+
+ALTER TABLE mac_address
+    DROP INDEX ux_mac_address_address,
+    DROP COLUMN address,
+    CHANGE address_int address BIGINT NOT NULL,
+    ADD UNIQUE INDEX ux_mac_address_address (address);
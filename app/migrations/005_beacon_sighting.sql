@@ -0,0 +1,10 @@
+-- Avistamientos de beacons reportados por los teléfonos de los visitantes.
+CREATE TABLE IF NOT EXISTS beacon_sighting (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    address BIGINT NOT NULL,
+    id_attraction INT,
+    rssi SMALLINT,
+    seen_at DATETIME NOT NULL,
+    create_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX ix_beacon_sighting_id_attraction (id_attraction)
+);
@@ -0,0 +1,8 @@
+-- Puntaje de popularidad acumulado por atracción, escalado a epoch
+-- (segundos Unix), ver services/popularity.py.
+CREATE TABLE IF NOT EXISTS attraction_popularity (
+    id_attraction INT NOT NULL PRIMARY KEY,
+    score DOUBLE NOT NULL DEFAULT 0,
+    epoch DOUBLE NOT NULL,
+    update_at DATETIME NULL
+);
@@ -0,0 +1,8 @@
+-- Registro de cambios usado por /sync; el id es el token de sincronización.
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    entity VARCHAR(30) NOT NULL,
+    entity_id INT NOT NULL,
+    op VARCHAR(10) NOT NULL,
+    create_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,13 @@
+-- Marca las atracciones con coordenadas válidas para los índices espaciales.
+-- Después de aplicarlo conviene correr "flask check-coordinates" para revisar
+-- las filas que quedaron sin marcar.
+ALTER TABLE attraction ADD COLUMN is_geolocated TINYINT(1) NOT NULL DEFAULT 0;
+
+UPDATE attraction
+SET is_geolocated = 1
+WHERE lat IS NOT NULL AND lng IS NOT NULL
+  AND lat BETWEEN -90 AND 90
+  AND lng BETWEEN -180 AND 180
+  AND NOT (lat = 0 AND lng = 0);
+
+CREATE INDEX ix_attraction_is_geolocated ON attraction (is_geolocated, is_delete);
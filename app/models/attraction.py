@@ -13,4 +13,6 @@ class Attraction(db.Model):
     id_user = db.Column(db.Integer)
     id_mac_address = db.Column(db.Integer)
     id_category = db.Column(db.Integer)
-    is_delete = db.Column(db.Boolean, default=False)
\ No newline at end of file
+    is_delete = db.Column(db.Boolean, default=False)
+    # Solo las atracciones con coordenadas válidas entran a los índices espaciales
+    is_geolocated = db.Column(db.Boolean, nullable=False, default=False)
@@ -0,0 +1,11 @@
+from app import db
+
+class AttractionImage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    id_attraction = db.Column(db.Integer, index=True)
+    url = db.Column(db.String(1024), nullable=False)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    byte_size = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64))
+    thumbnail = db.Column(db.String(255))
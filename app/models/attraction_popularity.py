@@ -0,0 +1,9 @@
+from app import db
+
+
+class AttractionPopularity(db.Model):
+    id_attraction = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # Suma de pesos escalados a epoch, ver services/popularity.py
+    score = db.Column(db.Float, nullable=False, default=0)
+    epoch = db.Column(db.Float, nullable=False)
+    update_at = db.Column(db.DateTime)
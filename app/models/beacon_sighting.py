@@ -0,0 +1,12 @@
+from app import db
+import datetime
+
+
+class BeaconSighting(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    address = db.Column(db.BigInteger, nullable=False)
+    id_attraction = db.Column(db.Integer, index=True)
+    rssi = db.Column(db.SmallInteger)
+    seen_at = db.Column(db.DateTime, nullable=False)
+    create_at = db.Column(db.TIMESTAMP,
+                          default=datetime.datetime.utcnow)
@@ -0,0 +1,5 @@
+from app import db
+
+class CacheVersion(db.Model):
+    name = db.Column(db.String(60), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
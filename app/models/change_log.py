@@ -0,0 +1,11 @@
+from app import db
+import datetime
+
+
+class ChangeLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    create_at = db.Column(db.TIMESTAMP,
+                          default=datetime.datetime.utcnow)
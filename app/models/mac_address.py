@@ -2,5 +2,6 @@ from app import db
 
 class MacAddress(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    address = db.Column(db.String(17), nullable=False)
+    # MAC canónica de 48 bits, ver services/mac.py
+    address = db.Column(db.BigInteger, nullable=False, unique=True)
     is_delete = db.Column(db.Boolean, default=False)
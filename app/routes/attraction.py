@@ -1,21 +1,44 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_from_directory
 from models.attraction import Attraction
 from models.detailMaterial import DetailMaterial
 from models.detailTecnique import DetailTecnique
-from models.tecnique import Tecnique
-from models.material import Material
 from models.category import Category
-from models.author import Author
-from models.style import Style
 from models.user import User
 from geopy.distance import geodesic
+from decouple import config
 
 
 from middleware.middleware import jwt_required
 from app import db
+from services import cache_versions
+from services import change_log
+from services import lookup_cache
+from services import catalog_snapshot
+from services import precompressed
+from services import images
+from services import popularity
+from services import search_index
+from services import facets
+from services import nearby
+from services import walking
+from services import tour
+from services import clusters
+from services import spatial_index
+from services import coordinates
 
 attraction_bp = Blueprint("attraction", __name__)
 
+MAX_BATCH_IDS = config("ATTRACTION_MAX_BATCH_IDS", default=200, cast=int)
+MAX_ROUTE_IDS = config("ATTRACTION_MAX_ROUTE_IDS", default=30, cast=int)
+MAX_WITHIN_LIMIT = config("ATTRACTION_MAX_WITHIN_LIMIT", default=1000, cast=int)
+
+
+def _list_img(img):
+    # Los listados devuelven miniaturas salvo que se pida ?images=full
+    if request.args.get("images") == "full":
+        return img
+    return images.list_img(img)
+
 
 @attraction_bp.route("/", methods=["POST"])
 @jwt_required
@@ -97,6 +120,14 @@ def create_attraction(data):
             message:
               type: string
               description: Mensaje de éxito.
+      400:
+        description: Coordenadas faltantes, fuera de rango o con lat y lng invertidas.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
       500:
         description: Error al crear la atracción.
         schema:
@@ -122,6 +153,11 @@ def create_attraction(data):
         materials = dataJson.get("material")  # Lista de materiales
         tecnicas = dataJson.get("tecnica")  # Lista de técnicas
 
+        try:
+            lat, lng = coordinates.validate(lat, lng)
+        except coordinates.CoordinateError as e:
+            return jsonify({"error": str(e)}), 400
+
         new_attraction = Attraction(
             name=name,
             lat=lat,
@@ -134,6 +170,7 @@ def create_attraction(data):
             id_user=id_user,
             id_mac_address=id_mac_address,
             id_category=id_category,
+            is_geolocated=True,
         )
 
         db.session.add(new_attraction)
@@ -157,7 +194,11 @@ def create_attraction(data):
             )
             db.session.add(new_tecnica)
 
+        change_log.record("attraction", new_attraction, "create")
         db.session.commit()
+        cache_versions.bump("attraction")
+        search_index.update(id_attraction)
+        clusters.update(id_attraction)
 
         return jsonify({"message": "Atracción creada exitosamente"}), 200
 
@@ -289,17 +330,17 @@ def get_all_attractions(data):
                 "lat": attraction.lat,
                 "lng": attraction.lng,
                 "description": attraction.description,
-                "img": attraction.img,
+                "img": _list_img(attraction.img),
                 "size": attraction.size,
             }
 
-            author = Author.query.get(attraction.id_author)
+            author = lookup_cache.authors.get(attraction.id_author)
             if author:
                 attraction_info["author"] = {
                   "id":author.id,
                   "name":author.name}
 
-            style = Style.query.get(attraction.id_style)
+            style = lookup_cache.styles.get(attraction.id_style)
             if style:
                 attraction_info["style"] = {
                   "id":style.id,
@@ -310,7 +351,7 @@ def get_all_attractions(data):
             if user:
                 attraction_info["userName"] = user.name
 
-            category = Category.query.get(attraction.id_category)
+            category = lookup_cache.categories.get(attraction.id_category)
             if category:
                 attraction_info["category"] = {
                   "id":category.id,
@@ -329,21 +370,23 @@ def get_all_attractions(data):
 
             for material in materials:
                 # Obtener el nombre del material a partir de su ID
-                material = Material.query.get(material.id_material)
-                material_info = {
-                    "id": material.id,
-                    "material_name": material.name,
-                }
-                material_data.append(material_info)
+                material = lookup_cache.materials.get(material.id_material)
+                if material:
+                    material_info = {
+                        "id": material.id,
+                        "material_name": material.name,
+                    }
+                    material_data.append(material_info)
 
             for tecnica in tecnicas:
                 # Obtener el nombre de la técnica a partir de su ID
-                tecnica = Tecnique.query.get(tecnica.id_tecnique)
-                tecnica_info = {
-                    "id": tecnica.id,
-                    "tecnique_name": tecnica.name,
-                }
-                tecnica_data.append(tecnica_info)
+                tecnica = lookup_cache.tecniques.get(tecnica.id_tecnique)
+                if tecnica:
+                    tecnica_info = {
+                        "id": tecnica.id,
+                        "tecnique_name": tecnica.name,
+                    }
+                    tecnica_data.append(tecnica_info)
 
             attraction_info["materials"] = material_data
             attraction_info["tecnicas"] = tecnica_data
@@ -449,6 +492,14 @@ def update_attraction(data, id_attraction):
             error:
               type: string
               description: Mensaje de error.
+      400:
+        description: Coordenadas faltantes, fuera de rango o con lat y lng invertidas.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
       500:
         description: Error al actualizar la atracción.
         schema:
@@ -466,10 +517,16 @@ def update_attraction(data, id_attraction):
 
         dataJson = request.get_json()
 
+        try:
+            lat, lng = coordinates.validate(dataJson.get("lat"), dataJson.get("lng"))
+        except coordinates.CoordinateError as e:
+            return jsonify({"error": str(e)}), 400
+
         # Actualizar los campos de la atracción con los datos proporcionados en el JSON
         existing_attraction.name = dataJson.get("name")
-        existing_attraction.lat = dataJson.get("lat")
-        existing_attraction.lng = dataJson.get("lng")
+        existing_attraction.lat = lat
+        existing_attraction.lng = lng
+        existing_attraction.is_geolocated = True
         existing_attraction.description = dataJson.get("description")
         existing_attraction.img = dataJson.get("img")
         existing_attraction.size = dataJson.get("size")
@@ -505,7 +562,11 @@ def update_attraction(data, id_attraction):
             )
             db.session.add(new_tecnica)
 
+        change_log.record("attraction", existing_attraction, "update")
         db.session.commit()
+        cache_versions.bump("attraction")
+        search_index.update(id_attraction)
+        clusters.update(id_attraction)
 
         return jsonify({"message": "Atracción actualizada exitosamente"}), 200
 
@@ -560,7 +621,11 @@ def delete_attraction(data, id_attraction):
 
         # Actualizar el campo is_delete a 1 (marcar como eliminado)
         existing_attraction.is_delete = 1
+        change_log.record("attraction", existing_attraction, "delete")
         db.session.commit()
+        cache_versions.bump("attraction")
+        search_index.update(id_attraction)
+        clusters.update(id_attraction)
 
         return jsonify({"message": "Atracción eliminada exitosamente"}), 200
 
@@ -677,11 +742,11 @@ def get_attraction_by_id(data, id_attraction):
         }
 
         # Obtener datos relacionados a través de consultas
-        author = Author.query.get(attraction.id_author)
+        author = lookup_cache.authors.get(attraction.id_author)
         if author:
             attraction_info["authorName"] = author.name
 
-        style = Style.query.get(attraction.id_style)
+        style = lookup_cache.styles.get(attraction.id_style)
         if style:
             attraction_info["styleName"] = style.name
 
@@ -689,7 +754,7 @@ def get_attraction_by_id(data, id_attraction):
         if user:
             attraction_info["userName"] = user.name
 
-        category = Category.query.get(attraction.id_category)
+        category = lookup_cache.categories.get(attraction.id_category)
         if category:
             attraction_info["categoryName"] = category.name
 
@@ -709,15 +774,17 @@ def get_attraction_by_id(data, id_attraction):
 
         for material in materials:
             # Obtener el nombre del material a partir de su ID
-            material_name = Material.query.get(material.id_material).name
-            material_info = {"material_name": material_name}
-            material_data.append(material_info)
+            material = lookup_cache.materials.get(material.id_material)
+            if material:
+                material_info = {"material_name": material.name}
+                material_data.append(material_info)
 
         for tecnica in tecnicas:
             # Obtener el nombre de la técnica a partir de su ID
-            tecnica_name = Tecnique.query.get(tecnica.id_tecnique).name
-            tecnica_info = {"tecnique_name": tecnica_name}
-            tecnica_data.append(tecnica_info)
+            tecnica = lookup_cache.tecniques.get(tecnica.id_tecnique)
+            if tecnica:
+                tecnica_info = {"tecnique_name": tecnica.name}
+                tecnica_data.append(tecnica_info)
 
         attraction_info["materials"] = material_data
         attraction_info["tecnicas"] = tecnica_data
@@ -727,6 +794,45 @@ def get_attraction_by_id(data, id_attraction):
     except Exception as e:
         return jsonify({"error": "Error al obtener la atracción: " + str(e)}), 500
 
+
+def _build_categories_with_attractions():
+    # En réplicas de solo lectura se responde desde el snapshot mapeado
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None:
+        categories = list(snapshot.categories())
+    else:
+        categories = Category.query.filter(Category.is_delete == 0).all()
+
+    categories_info = []
+    for category in categories:
+        category_info = {
+            "id": category.id,
+            "name": category.name,
+            "attractions": []
+        }
+
+        if snapshot is not None:
+            attractions = snapshot.attractions(category.id)
+        else:
+            attractions = Attraction.query.filter_by(id_category=category.id).filter(Attraction.is_delete == 0).all()
+
+        for attraction in attractions:
+            attraction_info = {
+                "category_name": category.name,
+                "id": attraction.id,
+                "name": attraction.name,
+                "lat": attraction.lat,
+                "lng": attraction.lng,
+                "description": attraction.description,
+                "img": _list_img(attraction.img)
+            }
+            category_info["attractions"].append(attraction_info)
+
+        categories_info.append(category_info)
+
+    return categories_info
+
+
 @attraction_bp.route("/GetAllAttractions", methods=["GET"])
 def getallattracctions():
     """
@@ -784,37 +890,30 @@ def getallattracctions():
               description: Mensaje de error.
     """
     try:
-        categories = Category.query.filter(Category.is_delete == 0).all()
+        key = "GetAllAttractions:full" if request.args.get("images") == "full" else "GetAllAttractions"
+        return precompressed.json_response(
+            key, precompressed.catalog_version(), _build_categories_with_attractions
+        )
 
-        categories_info = []
-        for category in categories:
-            category_info = {
-                "id": category.id,
-                "name": category.name,
-                "attractions": []
-            }
+    except Exception as e:
+        return jsonify({"error": "Error al obtener la información de categorias por atracciones: " + str(e)}), 500
 
-            attractions = Attraction.query.filter_by(id_category=category.id).filter(Attraction.is_delete == 0).all()
 
-            for attraction in attractions:
-                attraction_info = {
-                    "category_name": category.name,
-                    "id": attraction.id,
-                    "name": attraction.name,
-                    "lat": attraction.lat,
-                    "lng": attraction.lng,
-                    "description": attraction.description,
-                    "img": attraction.img
-                }
-                category_info["attractions"].append(attraction_info)
+def _build_all_categories():
+    categories = Category.query.filter(Category.is_delete == 0).all()
 
-            categories_info.append(category_info)
+    categories_info = []
+    for category in categories:
+        category_info = {
+            "id": category.id,
+            "name": category.name,
+            "description":category.description
+        }
+        categories_info.append(category_info)
+
+    return categories_info
 
-        return jsonify(categories_info), 200
 
-    except Exception as e:
-        return jsonify({"error": "Error al obtener la información de categorias por atracciones: " + str(e)}), 500
-    
 @attraction_bp.route("/GetAllCategories", methods=["GET"])
 def get_all_categories():
     """
@@ -848,18 +947,9 @@ def get_all_categories():
               description: Mensaje de error.
     """
     try:
-        categories = Category.query.filter(Category.is_delete == 0).all()
-
-        categories_info = []
-        for category in categories:
-            category_info = {
-                "id": category.id,
-                "name": category.name,
-                "description":category.description
-            }
-            categories_info.append(category_info)
-
-        return jsonify(categories_info), 200
+        return precompressed.json_response(
+            "GetAllCategories", precompressed.catalog_version(), _build_all_categories
+        )
 
     except Exception as e:
         return jsonify({"error": "Error al obtener la información de todas las categorias : " + str(e)}), 500
@@ -917,6 +1007,9 @@ def get_attraction_details(_id):
             img:
               type: string
               description: URL de la imagen de la atracción.
+            images:
+              type: array
+              description: Manifiesto de las imágenes (dimensiones, tamaño, hash y miniatura).
       404:
         description: Atracción no encontrada.
         schema:
@@ -941,32 +1034,37 @@ def get_attraction_details(_id):
         if attraction is None:
             return jsonify({"error": "Atracción no encontrada"}), 404
 
+        popularity.record_view(attraction.id)
+
         # Obtener datos relacionados a través de consultas
-        category = Category.query.get(attraction.id_category)
-        author = Author.query.get(attraction.id_author)
-        style = Style.query.get(attraction.id_style)
+        category = lookup_cache.categories.get(attraction.id_category)
+        author = lookup_cache.authors.get(attraction.id_author)
+        style = lookup_cache.styles.get(attraction.id_style)
         user = User.query.get(attraction.id_user)
 
         # Consulta de material asociado a la atracción
         material = DetailMaterial.query.filter_by(id_attraction=attraction.id).first()
+        material = lookup_cache.materials.get(material.id_material) if material else None
 
         # Consulta de técnica asociada a la atracción
         tecnique = DetailTecnique.query.filter_by(id_attraction=attraction.id).first()
+        tecnique = lookup_cache.tecniques.get(tecnique.id_tecnique) if tecnique else None
 
         # Crear un diccionario para almacenar los detalles de la atracción
         attraction_details = {
-            "id_category": category.id,
+            "id_category": attraction.id_category,
             "category_name": category.name if category else None,
             "name": attraction.name,
             "description": attraction.description,
             "author_name": author.name if author else None,
             "lat": attraction.lat,
             "lng": attraction.lng,
-            "tecnique_name": Tecnique.query.get(tecnique.id_tecnique).name if tecnique else None,
-            "material_name": Material.query.get(material.id_material).name if material else None,
+            "tecnique_name": tecnique.name if tecnique else None,
+            "material_name": material.name if material else None,
             "size": attraction.size,
             "style_name": style.name if style else None,
             "img": attraction.img,
+            "images": images.manifest(attraction.img),
         }
 
         return jsonify(attraction_details), 200
@@ -975,6 +1073,40 @@ def get_attraction_details(_id):
         return jsonify({"error": "Error al obtener los detalles de la atracción: " + str(e)}), 500
 
 
+def _build_attractions_by_category(id_category):
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None:
+        category = snapshot.category(id_category)
+    else:
+        category = Category.query.get(id_category)
+    if category is None:
+        return []
+
+    # Obtener todas las atracciones de la categoría
+    if snapshot is not None:
+        attractions = snapshot.attractions(category.id)
+    else:
+        attractions = Attraction.query.filter_by(id_category=id_category).filter(Attraction.is_delete == 0).all()
+
+    # Crear una lista para almacenar la información de las atracciones
+    attractions_info = []
+
+    for attraction in attractions:
+        attraction_info = {
+            "category_name": category.name,
+            "id": attraction.id,
+            "name": attraction.name,
+            "size": attraction.size,
+            "lat": attraction.lat,
+            "lng": attraction.lng,
+            "description": attraction.description,
+            "img": _list_img(attraction.img)
+        }
+        attractions_info.append(attraction_info)
+
+    return attractions_info
+
+
 @attraction_bp.route("/GetAttractionsByCategory/<_id>", methods=["GET"])
 def get_attractions_by_category(_id):
     """
@@ -1033,36 +1165,111 @@ def get_attractions_by_category(_id):
               description: Mensaje de error.
     """
     try:
+        snapshot = catalog_snapshot.get_snapshot()
+
         # Obtener la categoría por su ID
-        category = Category.query.get(_id)
+        if snapshot is not None:
+            try:
+                category = snapshot.category(int(_id))
+            except ValueError:
+                category = None
+        else:
+            category = Category.query.get(_id)
 
         if category is None:
             return jsonify({"error": "Categoría no encontrada"}), 404
 
-        # Obtener todas las atracciones de la categoría
-        attractions = Attraction.query.filter_by(id_category=_id).filter(Attraction.is_delete == 0).all()
-
-        # Crear una lista para almacenar la información de las atracciones
-        attractions_info = []
-
-        for attraction in attractions:
-            attraction_info = {
-                "category_name": category.name,
-                "id": attraction.id,
-                "name": attraction.name,
-                "size": attraction.size,
-                "lat": attraction.lat,
-                "lng": attraction.lng,
-                "description": attraction.description,
-                "img": attraction.img
-                
-            }
-            attractions_info.append(attraction_info)
-
-        return jsonify(attractions_info), 200
+        key = "GetAttractionsByCategory:%s" % category.id
+        if request.args.get("images") == "full":
+            key += ":full"
+        id_category = category.id
+        return precompressed.json_response(
+            key, precompressed.catalog_version(), lambda: _build_attractions_by_category(id_category)
+        )
     except Exception as e:
         return jsonify({"error": "Error al obtener las atracciones de la categoría: " + str(e)}), 500
     
+
+def _build_attractions_by_category_full(_id):
+    # Obtener todas las atracciones de la categoría
+    attractions = Attraction.query.filter_by(id_category=_id).filter(Attraction.is_delete == 0).all()
+
+    # Crear una lista para almacenar la información de las atracciones
+    attractions_info = []
+
+    for attraction in attractions:
+        attraction_info = {
+            "id": attraction.id,
+            "name": attraction.name,
+            "lat": attraction.lat,
+            "lng": attraction.lng,
+            "description": attraction.description,
+            "img": _list_img(attraction.img),
+            "size": attraction.size,
+        }
+
+        author = lookup_cache.authors.get(attraction.id_author)
+        if author:
+            attraction_info["author"] = {
+              "id":author.id,
+              "name":author.name}
+
+        style = lookup_cache.styles.get(attraction.id_style)
+        if style:
+            attraction_info["style"] = {
+              "id":style.id,
+              "name":style.name
+              }
+
+        user = User.query.get(attraction.id_user)
+        if user:
+            attraction_info["userName"] = user.name
+
+        category = lookup_cache.categories.get(attraction.id_category)
+        if category:
+            attraction_info["category"] = {
+              "id":category.id,
+              "name":category.name
+              }
+
+        materials = DetailMaterial.query.filter(
+            DetailMaterial.id_attraction == attraction.id
+        ).all()
+        tecnicas = DetailTecnique.query.filter(
+            DetailTecnique.id_attraction == attraction.id
+        ).all()
+
+        material_data = []
+        tecnica_data = []
+
+        for material in materials:
+            # Obtener el nombre del material a partir de su ID
+            material = lookup_cache.materials.get(material.id_material)
+            if material:
+                material_info = {
+                    "id": material.id,
+                    "material_name": material.name,
+                }
+                material_data.append(material_info)
+
+        for tecnica in tecnicas:
+            # Obtener el nombre de la técnica a partir de su ID
+            tecnica = lookup_cache.tecniques.get(tecnica.id_tecnique)
+            if tecnica:
+                tecnica_info = {
+                    "id": tecnica.id,
+                    "tecnique_name": tecnica.name,
+                }
+                tecnica_data.append(tecnica_info)
+
+        attraction_info["materials"] = material_data
+        attraction_info["tecnicas"] = tecnica_data
+
+        attractions_info.append(attraction_info)
+
+    return attractions_info
+
+
 @attraction_bp.route("/GetAttractionsByCategoryFull/<_id>", methods=["GET"])
 def get_attractions_by_category_full(_id):
     """
@@ -1160,81 +1367,13 @@ def get_attractions_by_category_full(_id):
         if category is None:
             return jsonify({"error": "Categoría no encontrada"}), 404
 
-        # Obtener todas las atracciones de la categoría
-        attractions = Attraction.query.filter_by(id_category=_id).filter(Attraction.is_delete == 0).all()
-
-        # Crear una lista para almacenar la información de las atracciones
-        attractions_info = []
-
-        for attraction in attractions:
-            attraction_info = {
-                "id": attraction.id,
-                "name": attraction.name,
-                "lat": attraction.lat,
-                "lng": attraction.lng,
-                "description": attraction.description,
-                "img": attraction.img,
-                "size": attraction.size,
-            }
-
-            author = Author.query.get(attraction.id_author)
-            if author:
-                attraction_info["author"] = {
-                  "id":author.id,
-                  "name":author.name}
-
-            style = Style.query.get(attraction.id_style)
-            if style:
-                attraction_info["style"] = {
-                  "id":style.id,
-                  "name":style.name
-                  }
-
-            user = User.query.get(attraction.id_user)
-            if user:
-                attraction_info["userName"] = user.name
-
-            category = Category.query.get(attraction.id_category)
-            if category:
-                attraction_info["category"] = {
-                  "id":category.id,
-                  "name":category.name
-                  }
-
-            materials = DetailMaterial.query.filter(
-                DetailMaterial.id_attraction == attraction.id
-            ).all()
-            tecnicas = DetailTecnique.query.filter(
-                DetailTecnique.id_attraction == attraction.id
-            ).all()
-
-            material_data = []
-            tecnica_data = []
-
-            for material in materials:
-                # Obtener el nombre del material a partir de su ID
-                material = Material.query.get(material.id_material)
-                material_info = {
-                    "id": material.id,
-                    "material_name": material.name,
-                }
-                material_data.append(material_info)
-
-            for tecnica in tecnicas:
-                # Obtener el nombre de la técnica a partir de su ID
-                tecnica = Tecnique.query.get(tecnica.id_tecnique)
-                tecnica_info = {
-                    "id": tecnica.id,
-                    "tecnique_name": tecnica.name,
-                }
-                tecnica_data.append(tecnica_info)
-
-            attraction_info["materials"] = material_data
-            attraction_info["tecnicas"] = tecnica_data
-
-            attractions_info.append(attraction_info)
-
-        return jsonify(attractions_info), 200
+        key = "GetAttractionsByCategoryFull:%s" % _id
+        if request.args.get("images") == "full":
+            key += ":full"
+        version = precompressed.catalog_version("author", "style", "material", "tecnique")
+        return precompressed.json_response(
+            key, version, lambda: _build_attractions_by_category_full(_id)
+        )
     except Exception as e:
         return jsonify({"error": "Error al obtener las atracciones de la categoría: " + str(e)}), 500
     
@@ -1254,9 +1393,15 @@ def get_nearby_attractions(lat,lng):
         type: string
         required: true
         description: Longitude of the user's location.
+      - name: mode
+        in: query
+        type: string
+        required: false
+        enum: [straight, walking]
+        description: Distance used for ranking. "walking" follows the pedestrian graph when one is configured and falls back to straight-line distance otherwise; the X-Distance-Mode header tells which one was used.
     responses:
       200:
-        description: Top 3 attractions closest to the provided coordinates.
+        description: Top 3 attractions within 6 km, ranked by distance and popularity.
         schema:
           type: array
           items:
@@ -1286,6 +1431,9 @@ def get_nearby_attractions(lat,lng):
               distance:
                 type: number
                 description: Distance from the user's coordinates.
+              popularity:
+                type: number
+                description: Popularity relative to the most visited attraction (0 to 1).
       400:
         description: Invalid latitude or longitude provided.
         schema:
@@ -1304,39 +1452,708 @@ def get_nearby_attractions(lat,lng):
               description: Error message.
     """
     try:
-      lat_float = float(lat)
-      lng_float = float(lng)
-      print("try")
-      Atractions =  Attraction.query.filter(Attraction.is_delete == 0).all()
-      print("done")
-      points = []
-      for attraction in Atractions:
-        points.append({
-                "id": attraction.id,
-                "name": attraction.name,
-                "lat": attraction.lat,
-                "lng": attraction.lng,
-                "description": attraction.description,
-                "img": attraction.img,
-                "size": attraction.size,
-                "distance": 0
-            })
-        
+      # inf o nan llegarían hasta haversine y la geohash
+      try:
+        lat_float, lng_float = coordinates.parse_point(lat, lng)
+      except coordinates.CoordinateError as e:
+        return jsonify({"error": str(e)}), 400
+      # Candidatos de la celda geohash del usuario, ver services/nearby.py
+      Atractions = nearby.candidates(lat_float, lng_float, 6)
+
+      # Distancias caminando sobre el grafo peatonal, ver services/walking.py
+      walking_distances = None
+      if request.args.get("mode") == "walking":
+        walking_distances = walking.distances(lat_float, lng_float, Atractions, 6, nearby.get_points())
+
       user_coords = (lat_float,lng_float)
       close_points = []
-      for point in points :
-        try:
-          point["distance"] = geodesic(user_coords, (point['lat'],point['lng'])).kilometers
-          if point["distance"]  <= 6:
-            close_points.append(point)
-        except Exception as ex:
-          print("la atracción {} se registro de forma incorrecta".format(point['name']))
-      ordered_points=sorted(close_points, key=lambda x: x['distance'])
-      return jsonify(ordered_points[:3])
+      # Los candidatos ya tienen coordenadas válidas (is_geolocated)
+      for attraction in Atractions :
+        if walking_distances is not None:
+          distance = walking_distances.get(attraction.id)
+          if distance is None:
+            continue
+        else:
+          distance = geodesic(user_coords, (attraction.lat,attraction.lng)).kilometers
+        if distance  <= 6:
+          close_points.append({
+              "id": attraction.id,
+              "name": attraction.name,
+              "lat": attraction.lat,
+              "lng": attraction.lng,
+              "description": attraction.description,
+              "img": _list_img(attraction.img),
+              "size": attraction.size,
+              "distance": distance,
+              "popularity": popularity.normalized(attraction.id),
+          })
+      # Se ordena combinando la distancia con la popularidad
+      ordered_points=sorted(close_points, key=lambda x: popularity.rank(x['distance'], 6, x['popularity']))
+      response = jsonify(ordered_points[:3])
+      response.headers["X-Distance-Mode"] = "walking" if walking_distances is not None else "straight"
+      return response
         
 
     except Exception as e:
         return jsonify({"error": "Error al obtener las atracciones cercanas: " + str(e)}), 500
 
 
+@attraction_bp.route("/thumbnails/<path:filename>", methods=["GET"])
+def get_thumbnail(filename):
+    """
+    Obtener la miniatura de una imagen de atracción
+    ---
+    parameters:
+      - name: filename
+        in: path
+        type: string
+        required: true
+        description: Nombre de la miniatura devuelto en los listados.
+    responses:
+      200:
+        description: Miniatura en WebP o JPEG.
+      404:
+        description: Miniatura no encontrada.
+    """
+    # El nombre incluye el hash del contenido, así que nunca cambia
+    return send_from_directory(images.THUMBNAIL_DIR, filename, max_age=31536000)
+
 
+@attraction_bp.route("/search", methods=["GET"])
+def search_attractions():
+    """
+    Buscar atracciones por texto
+    ---
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Texto a buscar en el nombre, la descripción, el autor, el estilo, los materiales y las técnicas. No distingue acentos y la última palabra se toma como prefijo.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (20 por defecto, 100 como máximo).
+    responses:
+      200:
+        description: Atracciones encontradas, de mayor a menor relevancia.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: ID de la atracción.
+              name:
+                type: string
+                description: Nombre de la atracción.
+              lat:
+                type: number
+                description: Latitud de la atracción.
+              lng:
+                type: number
+                description: Longitud de la atracción.
+              img:
+                type: array
+                description: Miniaturas de la atracción.
+              id_category:
+                type: integer
+                description: ID de la categoría de la atracción.
+              score:
+                type: number
+                description: Relevancia del resultado.
+      500:
+        description: Error al buscar las atracciones.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        query = request.args.get("q", "")
+        limit = max(1, min(request.args.get("limit", 20, type=int), 100))
+
+        results = search_index.search(query, limit)
+        for result in results:
+            result["img"] = _list_img(result["img"])
+
+        return jsonify(results), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al buscar las atracciones: " + str(e)}), 500
+
+
+@attraction_bp.route("/filter", methods=["GET"])
+def filter_attractions():
+    """
+    Filtrar atracciones por facetas
+    ---
+    parameters:
+      - name: category
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        required: false
+        description: IDs de categoría.
+      - name: author
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        required: false
+        description: IDs de autor.
+      - name: style
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        required: false
+        description: IDs de estilo.
+      - name: material
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        required: false
+        description: IDs de material.
+      - name: tecnique
+        in: query
+        type: array
+        items:
+          type: integer
+        collectionFormat: multi
+        required: false
+        description: IDs de técnica.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de atracciones (50 por defecto, 500 como máximo).
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Número de atracciones a omitir.
+    responses:
+      200:
+        description: Atracciones que cumplen todos los filtros y conteos por faceta. Dentro de una faceta los valores se combinan con O y entre facetas con Y.
+        schema:
+          type: object
+          properties:
+            total:
+              type: integer
+              description: Número total de atracciones que cumplen los filtros.
+            attractions:
+              type: array
+              description: Página de atracciones (id, name, lat, lng, img, id_category).
+            facets:
+              type: object
+              description: Por cada faceta, lista de valores con id, name y count.
+      400:
+        description: Filtro inválido.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al filtrar las atracciones.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        selected = {}
+        for facet in facets.FACETS:
+            try:
+                selected[facet] = [int(value) for value in request.args.getlist(facet)]
+            except ValueError:
+                return jsonify({"error": "Filtro inválido: " + facet}), 400
+
+        limit = max(1, min(request.args.get("limit", 50, type=int), 500))
+        offset = max(request.args.get("offset", 0, type=int), 0)
+
+        index = facets.get_index()
+        bits, counts = index.filter(selected)
+
+        attractions = []
+        for summary in index.summaries_for(bits, offset, limit):
+            attraction_info = dict(summary)
+            attraction_info["img"] = _list_img(summary["img"])
+            attractions.append(attraction_info)
+
+        return jsonify({
+            "total": bits.bit_count(),
+            "attractions": attractions,
+            "facets": facets.facet_counts(counts),
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al filtrar las atracciones: " + str(e)}), 500
+
+
+def _batch_id(value):
+    # int(1.5) o int(True) pasarían en silencio como otro ID
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("ID inválido: {!r}".format(value))
+    return int(value)
+
+
+def _parse_batch_ids():
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ValueError("El cuerpo debe ser un objeto JSON")
+        ids = body.get("ids")
+    else:
+        raw = request.args.get("ids", "")
+        ids = [value for value in raw.split(",") if value.strip()]
+    if not isinstance(ids, list):
+        raise ValueError("ids debe ser una lista")
+    return [_batch_id(value) for value in ids]
+
+
+@attraction_bp.route("/batch", methods=["GET", "POST"])
+def get_attractions_batch():
+    """
+    Obtener los detalles de varias atracciones por sus IDs
+    ---
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: IDs separados por comas (GET).
+      - name: data
+        in: body
+        required: false
+        description: Para listas largas (POST).
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+    responses:
+      200:
+        description: Detalles de las atracciones en el mismo orden en que se pidieron.
+        schema:
+          type: object
+          properties:
+            attractions:
+              type: array
+              description: Misma forma que GetAttractionById más id, materials y tecnicas.
+            missing:
+              type: array
+              description: IDs que no existen o fueron eliminados.
+      400:
+        description: Lista de IDs inválida o demasiado larga.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al obtener las atracciones.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        try:
+            ids = _parse_batch_ids()
+        except (TypeError, ValueError):
+            return jsonify({"error": "Lista de IDs inválida"}), 400
+
+        if len(ids) > MAX_BATCH_IDS:
+            return jsonify({"error": "Se permiten como máximo {} IDs por consulta".format(MAX_BATCH_IDS)}), 400
+
+        unique_ids = list(dict.fromkeys(ids))
+
+        # Tres consultas sin importar cuántas atracciones se pidan
+        attractions = {}
+        materials = {}
+        tecnicas = {}
+        if unique_ids:
+            attractions = {
+                attraction.id: attraction
+                for attraction in Attraction.query.filter(
+                    Attraction.id.in_(unique_ids), Attraction.is_delete == 0
+                ).all()
+            }
+            for detail in DetailMaterial.query.filter(DetailMaterial.id_attraction.in_(unique_ids)).all():
+                materials.setdefault(detail.id_attraction, []).append(detail.id_material)
+            for detail in DetailTecnique.query.filter(DetailTecnique.id_attraction.in_(unique_ids)).all():
+                tecnicas.setdefault(detail.id_attraction, []).append(detail.id_tecnique)
+
+        attractions_info = []
+        missing = []
+        for id in ids:
+            attraction = attractions.get(id)
+            if attraction is None:
+                missing.append(id)
+                continue
+
+            category = lookup_cache.categories.get(attraction.id_category)
+            author = lookup_cache.authors.get(attraction.id_author)
+            style = lookup_cache.styles.get(attraction.id_style)
+
+            material_data = []
+            for id_material in materials.get(id, []):
+                material = lookup_cache.materials.get(id_material)
+                if material:
+                    material_data.append({"id": material.id, "material_name": material.name})
+
+            tecnica_data = []
+            for id_tecnique in tecnicas.get(id, []):
+                tecnica = lookup_cache.tecniques.get(id_tecnique)
+                if tecnica:
+                    tecnica_data.append({"id": tecnica.id, "tecnique_name": tecnica.name})
+
+            attractions_info.append({
+                "id": attraction.id,
+                "id_category": attraction.id_category,
+                "category_name": category.name if category else None,
+                "name": attraction.name,
+                "description": attraction.description,
+                "author_name": author.name if author else None,
+                "lat": attraction.lat,
+                "lng": attraction.lng,
+                "tecnique_name": tecnica_data[0]["tecnique_name"] if tecnica_data else None,
+                "material_name": material_data[0]["material_name"] if material_data else None,
+                "size": attraction.size,
+                "style_name": style.name if style else None,
+                "img": _list_img(attraction.img),
+                "materials": material_data,
+                "tecnicas": tecnica_data,
+            })
+
+        return jsonify({"attractions": attractions_info, "missing": missing}), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al obtener las atracciones: " + str(e)}), 500
+
+
+@attraction_bp.route("/route", methods=["POST"])
+def plan_route():
+    """
+    Ordenar un conjunto de atracciones en un recorrido a pie
+    ---
+    parameters:
+      - name: data
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - ids
+          properties:
+            ids:
+              type: array
+              description: IDs de las atracciones a visitar.
+              items:
+                type: integer
+            lat:
+              type: number
+              description: Latitud del punto de partida.
+            lng:
+              type: number
+              description: Longitud del punto de partida. Sin lat y lng el recorrido empieza en la atracción más conveniente.
+    responses:
+      200:
+        description: Atracciones en el orden sugerido de visita.
+        schema:
+          type: object
+          properties:
+            route:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    description: ID de la atracción.
+                  name:
+                    type: string
+                    description: Nombre de la atracción.
+                  lat:
+                    type: number
+                    description: Latitud de la ubicacion.
+                  lng:
+                    type: number
+                    description: Longitud de la ubicacion.
+                  distance:
+                    type: number
+                    description: Kilómetros en línea recta desde la parada anterior o el punto de partida.
+            distance:
+              type: number
+              description: Kilómetros totales del recorrido.
+            missing:
+              type: array
+              description: IDs que no existen, fueron eliminados o no tienen coordenadas válidas.
+      400:
+        description: Lista de IDs o punto de partida inválidos.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al calcular el recorrido.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            ids = _parse_batch_ids()
+        except (TypeError, ValueError):
+            return jsonify({"error": "Lista de IDs inválida"}), 400
+
+        if len(ids) > MAX_ROUTE_IDS:
+            return jsonify({"error": "Se permiten como máximo {} atracciones por recorrido".format(MAX_ROUTE_IDS)}), 400
+
+        start = None
+        if data.get("lat") is not None or data.get("lng") is not None:
+            try:
+                start = (float(data.get("lat")), float(data.get("lng")))
+            except (TypeError, ValueError):
+                return jsonify({"error": "Punto de partida inválido"}), 400
+            if not (-90 <= start[0] <= 90 and -180 <= start[1] <= 180):
+                return jsonify({"error": "Punto de partida inválido"}), 400
+
+        ordered, legs, missing = tour.plan(ids, start)
+        route_info = [
+            {
+                "id": attraction.id,
+                "name": attraction.name,
+                "lat": attraction.lat,
+                "lng": attraction.lng,
+                "distance": distance,
+            }
+            for attraction, distance in zip(ordered, legs)
+        ]
+
+        return jsonify({"route": route_info, "distance": sum(legs), "missing": missing}), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al calcular el recorrido: " + str(e)}), 500
+
+
+@attraction_bp.route("/clusters", methods=["GET"])
+def get_attraction_clusters():
+    """
+    Obtener las atracciones agrupadas para un nivel de zoom del mapa
+    ---
+    parameters:
+      - name: bbox
+        in: query
+        type: string
+        required: true
+        description: Caja visible como "oeste,sur,este,norte" (lng,lat,lng,lat). Si oeste es mayor que este la caja cruza el antimeridiano.
+      - name: zoom
+        in: query
+        type: integer
+        required: true
+        description: Nivel de zoom del mapa (0 en adelante).
+    responses:
+      200:
+        description: Grupos de atracciones dentro de la caja.
+        schema:
+          type: object
+          properties:
+            clusters:
+              type: array
+              items:
+                type: object
+                properties:
+                  lat:
+                    type: number
+                    description: Latitud del centroide del grupo.
+                  lng:
+                    type: number
+                    description: Longitud del centroide del grupo.
+                  count:
+                    type: integer
+                    description: Número de atracciones en el grupo.
+                  id:
+                    type: integer
+                    description: ID de la atracción cuando el grupo tiene una sola.
+      400:
+        description: Caja o zoom inválidos.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al agrupar las atracciones.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        try:
+            west, south, east, north = [float(value) for value in request.args.get("bbox", "").split(",")]
+            zoom = int(request.args.get("zoom", ""))
+        except ValueError:
+            return jsonify({"error": "Parámetros bbox y zoom inválidos"}), 400
+
+        if not (
+            -90 <= south <= north <= 90
+            and -180 <= west <= 180
+            and -180 <= east <= 180
+            and zoom >= 0
+        ):
+            return jsonify({"error": "Parámetros bbox y zoom inválidos"}), 400
+
+        return jsonify({"clusters": clusters.clusters(south, west, north, east, zoom)}), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al agrupar las atracciones: " + str(e)}), 500
+
+
+@attraction_bp.route("/within", methods=["GET"])
+def get_attractions_within():
+    """
+    Obtener las atracciones visibles en una caja del mapa
+    ---
+    parameters:
+      - name: min_lat
+        in: query
+        type: number
+        required: true
+        description: Latitud del borde sur.
+      - name: min_lng
+        in: query
+        type: number
+        required: true
+        description: Longitud del borde oeste. Si es mayor que max_lng la caja cruza el antimeridiano.
+      - name: max_lat
+        in: query
+        type: number
+        required: true
+        description: Latitud del borde norte.
+      - name: max_lng
+        in: query
+        type: number
+        required: true
+        description: Longitud del borde este.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Máximo de atracciones a devolver (200 por omisión). Se devuelven primero las más populares.
+    responses:
+      200:
+        description: Atracciones dentro de la caja.
+        schema:
+          type: object
+          properties:
+            attractions:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: integer
+                    description: ID de la atracción.
+                  name:
+                    type: string
+                    description: Nombre de la atracción.
+                  lat:
+                    type: number
+                    description: Latitud de la ubicacion.
+                  lng:
+                    type: number
+                    description: Longitud de la ubicacion.
+                  id_category:
+                    type: integer
+                    description: ID de la categoría.
+                  thumbnail:
+                    type: string
+                    description: URL de la miniatura de la primera imagen.
+            truncated:
+              type: boolean
+              description: Indica si había más atracciones que limit en la caja.
+      400:
+        description: Caja o límite inválidos.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al obtener las atracciones.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        try:
+            min_lat = float(request.args["min_lat"])
+            min_lng = float(request.args["min_lng"])
+            max_lat = float(request.args["max_lat"])
+            max_lng = float(request.args["max_lng"])
+            limit = int(request.args.get("limit", 200))
+        except (KeyError, ValueError):
+            return jsonify({"error": "Parámetros de la caja inválidos"}), 400
+
+        if not (
+            -90 <= min_lat <= max_lat <= 90
+            and -180 <= min_lng <= 180
+            and -180 <= max_lng <= 180
+            and 0 < limit <= MAX_WITHIN_LIMIT
+        ):
+            return jsonify({"error": "Parámetros de la caja inválidos"}), 400
+
+        points = spatial_index.get_index().within(min_lat, min_lng, max_lat, max_lng)
+        points.sort(key=lambda point: (-popularity.normalized(point.id), point.id))
+
+        attractions_info = []
+        for point in points[:limit]:
+            urls = images.image_urls(point.img)
+            attractions_info.append({
+                "id": point.id,
+                "name": point.name,
+                "lat": point.lat,
+                "lng": point.lng,
+                "id_category": point.id_category,
+                "thumbnail": images.thumbnail_url(urls[0]) if urls else None,
+            })
+
+        return jsonify({"attractions": attractions_info, "truncated": len(points) > limit}), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al obtener las atracciones: " + str(e)}), 500
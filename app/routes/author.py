@@ -2,6 +2,9 @@ from flask import Blueprint, jsonify, request
 from models.author import Author
 from middleware.middleware import jwt_required
 from app import db
+from services import cache_versions
+from services import change_log
+from services import suggest
 
 author_bp = Blueprint("author", __name__)
 
@@ -70,7 +73,9 @@ def create_author(data):
         )
 
         db.session.add(new_author)
+        change_log.record("author", new_author, "create")
         db.session.commit()
+        cache_versions.bump("author")
 
         return jsonify({"message": "Autor creado exitosamente"}), 200
 
@@ -289,7 +294,9 @@ def update_author(data, id):
             author.birthday = dataJson.get("birthday")
             author.death = dataJson.get("death")
 
+            change_log.record("author", author, "update")
             db.session.commit()
+            cache_versions.bump("author")
 
             return jsonify({"message": "Autor actualizado exitosamente"}), 200
         else:
@@ -342,11 +349,62 @@ def delete_author(data, id):
 
         if author:
             author.is_delete = 1
+            change_log.record("author", author, "delete")
             db.session.commit()
+            cache_versions.bump("author")
 
             return jsonify({"message": "Autor eliminado exitosamente"}), 200
         else:
             return jsonify({"message": "Autor no encontrado"}), 404
 
     except Exception as e:
-        return jsonify({"error": "Error al eliminar el autor: " + str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Error al eliminar el autor: " + str(e)}), 500
+
+
+@author_bp.route("/suggest", methods=["GET"])
+@jwt_required
+def suggest_authors(data):
+    """
+    Autocompletar autores por prefijo
+    ---
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Inicio de cualquier palabra del nombre, sin distinguir acentos.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (10 por defecto, 50 como máximo).
+    responses:
+      200:
+        description: Lista de autores que coinciden.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: identificador.
+              name:
+                type: string
+                description: nombre del elemento.
+      500:
+        description: Error al buscar autores.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error."""
+    try:
+        prefix = request.args.get("prefix", "")
+        limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+
+        return jsonify(suggest.authors.suggest(prefix, limit)), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al buscar los autores: " + str(e)}), 500
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models.category import Category
 from app import db
+from services import cache_versions
+from services import change_log
+from services import suggest
 
 category_bp = Blueprint('category', __name__)
 
@@ -108,7 +111,9 @@ def create_category(data):
         new_category = Category(name=name, description=description)
 
         db.session.add(new_category)
+        change_log.record("category", new_category, "create")
         db.session.commit()
+        cache_versions.bump("category")
 
         return jsonify({'message': 'Categoría creado exitosamente'}), 200
 
@@ -223,7 +228,9 @@ def update_category(data, id):
             category.name = data.get('name')
             category.description = data.get('description')
 
+            change_log.record("category", category, "update")
             db.session.commit()
+            cache_versions.bump("category")
 
             return jsonify({'message': 'Categoría actualizada exitosamente'}), 200
         else:
@@ -278,10 +285,61 @@ def delete_category(data, id):
 
         # Actualizar el campo is_delete a 1 (marcar como eliminado)
         category.is_delete = 1
+        change_log.record("category", category, "delete")
         db.session.commit()
+        cache_versions.bump("category")
         return jsonify({'message': 'Categoría eliminada exitosamente'}), 200
 
             
 
     except Exception as e:
-        return jsonify({'error': 'Error al eliminar la Categoría: ' + str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': 'Error al eliminar la Categoría: ' + str(e)}), 500
+
+
+@category_bp.route('/suggest', methods=['GET'])
+@jwt_required
+def suggest_categories(data):
+    """
+    Autocompletar categorías por prefijo
+    ---
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Inicio de cualquier palabra del nombre, sin distinguir acentos.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (10 por defecto, 50 como máximo).
+    responses:
+      200:
+        description: Lista de categorías que coinciden.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: identificador.
+              name:
+                type: string
+                description: nombre del elemento.
+      500:
+        description: Error al buscar categorías.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error."""
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+        return jsonify(suggest.categories.suggest(prefix, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Error al buscar las categorías: ' + str(e)}), 500
@@ -0,0 +1,50 @@
+from flask import Blueprint, jsonify
+from services import warmup
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.route("/live", methods=["GET"])
+def live():
+    """
+    Verificar que el proceso responde
+    ---
+    responses:
+      200:
+        description: El worker está vivo.
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              description: Siempre "ok".
+    """
+    return jsonify({"status": "ok"}), 200
+
+
+@health_bp.route("/ready", methods=["GET"])
+def ready():
+    """
+    Verificar que el worker puede recibir tráfico
+    ---
+    responses:
+      200:
+        description: Las caches del catálogo ya están precalentadas.
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              description: ready
+      503:
+        description: El worker todavía está precalentando las caches.
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              description: warming
+    """
+    if not warmup.is_ready():
+        return jsonify({"status": "warming"}), 503
+    return jsonify({"status": "ready"}), 200
@@ -1,9 +1,23 @@
+import datetime
 from flask import Blueprint, request, jsonify
+from decouple import config
+from sqlalchemy.exc import IntegrityError
 from models.mac_address import MacAddress
 from app import db
+from services import cache_versions
+from services import images
+from services import mac_index
+from services import sightings
+from services import popularity
+from services.mac import parse_mac, format_mac
 
 mac_address_bp = Blueprint('mac_address', __name__)
 
+MAX_RESOLVE_BATCH = config("MAC_RESOLVE_MAX_BATCH", default=100, cast=int)
+MAX_SIGHTINGS_BATCH = config("SIGHTINGS_MAX_BATCH", default=500, cast=int)
+# Antigüedad máxima aceptada para un avistamiento, en segundos
+MAX_SIGHTING_AGE = config("SIGHTINGS_MAX_AGE_SECONDS", default=86400, cast=int)
+
 from middleware.middleware import jwt_required
 
 @mac_address_bp.route("/", methods=["POST"])
@@ -32,6 +46,22 @@ def create_mac_address(data):
             message:
               type: string
               description: Mensaje de éxito.
+      400:
+        description: Mac Address inválida.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      409:
+        description: La Mac Address ya está registrada.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
       500:
         description: Error al crear la Mac Address.
         schema:
@@ -43,7 +73,10 @@ def create_mac_address(data):
     try:
         dataJson = request.get_json()
 
-        address = dataJson.get("mac_address")
+        address = parse_mac(dataJson.get("mac_address"))
+
+        if address is None:
+            return jsonify({"error": "Mac Address inválida"}), 400
 
         new_mac_address = MacAddress(
             address=address
@@ -51,9 +84,15 @@ def create_mac_address(data):
 
         db.session.add(new_mac_address)
         db.session.commit()
+        cache_versions.bump("mac_address")
 
         return jsonify({"message": "Mac Address creada exitosamente"}), 200
 
+    except IntegrityError:
+        # El índice único de address rechaza las repetidas
+        db.session.rollback()
+        return jsonify({"error": "Mac Address ya registrada"}), 409
+
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Error al crear la Mac Address: " + str(e)}), 500
@@ -102,7 +141,7 @@ def get_all_mac_address(data):
             # Crear un diccionario para almacenar los datos de la Mac Address
             mac_address_info = {
                 "id": mac_address.id,
-                "mac_address": mac_address.address,
+                "mac_address": format_mac(mac_address.address),
             }
 
             mac_address_data.append(mac_address_info)
@@ -143,6 +182,14 @@ def update_mac_address(data, mac_address_id):
             message:
               type: string
               description: Mensaje de éxito.
+      400:
+        description: Mac Address inválida.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
       404:
         description: Mac Address no encontrada.
         schema:
@@ -151,6 +198,14 @@ def update_mac_address(data, mac_address_id):
             error:
               type: string
               description: Mensaje de error.
+      409:
+        description: La Mac Address ya está registrada.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
       500:
         description: Error al actualizar la Mac Address.
         schema:
@@ -169,12 +224,23 @@ def update_mac_address(data, mac_address_id):
         dataJson = request.get_json()
 
         # Actualizar los campos de la Mac Address con los datos proporcionados en el JSON
-        existing_mac_address.address = dataJson.get("mac_address")
+        address = parse_mac(dataJson.get("mac_address"))
+
+        if address is None:
+            return jsonify({"error": "Mac Address inválida"}), 400
+
+        existing_mac_address.address = address
 
         db.session.commit()
+        cache_versions.bump("mac_address")
 
         return jsonify({"message": "Mac Address actualizada exitosamente"}), 200
 
+    except IntegrityError:
+        # El índice único de address rechaza las repetidas
+        db.session.rollback()
+        return jsonify({"error": "Mac Address ya registrada"}), 409
+
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Error al actualizar la Mac Address: " + str(e)}), 500
@@ -229,7 +295,7 @@ def get_mac_address_by_id(data, mac_address_id):
         # Crear un diccionario para almacenar los datos de la Mac Address
         mac_address_info = {
             "id": mac_address.id,
-            "mac_address": mac_address.address,
+            "mac_address": format_mac(mac_address.address),
         }
 
         return jsonify(mac_address_info), 200
@@ -284,9 +350,237 @@ def delete_mac_address(data, mac_address_id):
         # Actualizar el campo is_delete a 1 (marcar como eliminado)
         existing_mac_address.is_delete = 1
         db.session.commit()
+        cache_versions.bump("mac_address")
 
         return jsonify({"message": "Mac Address eliminada exitosamente"}), 200
 
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Error al eliminar la Mac Address: " + str(e)}), 500
+
+
+@mac_address_bp.route("/resolve", methods=["GET"])
+def resolve_mac_addresses():
+    """
+    Resolver un lote de Mac Address escaneadas a sus atracciones
+    ---
+    parameters:
+      - name: addr
+        in: query
+        type: array
+        items:
+          type: string
+        collectionFormat: multi
+        required: true
+        description: Mac Address escaneadas, en cualquier formato (AA:BB:.., aa-bb-.., aabb..).
+    responses:
+      200:
+        description: Atracciones asociadas a las Mac Address.
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              description: Una entrada por cada Mac Address válida, en el orden recibido.
+              items:
+                type: object
+                properties:
+                  addr:
+                    type: string
+                    description: Mac Address recibida.
+                  id_attraction:
+                    type: integer
+                    description: ID de la atracción o null si no hay ninguna.
+            attractions:
+              type: array
+              description: Atracciones encontradas, sin repetir.
+            invalid:
+              type: array
+              description: Valores que no son Mac Address válidas.
+      400:
+        description: Lote vacío o demasiado grande.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al resolver las Mac Address.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        addresses = request.args.getlist("addr")
+
+        if not addresses:
+            return jsonify({"error": "Debe indicar al menos una Mac Address"}), 400
+
+        if len(addresses) > MAX_RESOLVE_BATCH:
+            return jsonify({"error": "Se permiten como máximo {} Mac Address por consulta".format(MAX_RESOLVE_BATCH)}), 400
+
+        matches, invalid = mac_index.resolve(addresses)
+
+        results = []
+        attractions = {}
+        for address, attraction in matches:
+            results.append({
+                "addr": address,
+                "id_attraction": attraction.id if attraction else None,
+            })
+            if attraction and attraction.id not in attractions:
+                attractions[attraction.id] = {
+                    "id": attraction.id,
+                    "name": attraction.name,
+                    "lat": attraction.lat,
+                    "lng": attraction.lng,
+                    "description": attraction.description,
+                    "img": images.list_img(attraction.img),
+                    "size": attraction.size,
+                    "id_category": attraction.id_category,
+                }
+
+        return jsonify({
+            "results": results,
+            "attractions": list(attractions.values()),
+            "invalid": invalid,
+        }), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al resolver las Mac Address: " + str(e)}), 500
+
+
+def _parse_sighting(item, index, now):
+    """Valida un avistamiento y devuelve la fila a guardar o un mensaje de error."""
+    if not isinstance(item, dict):
+        return None, "Avistamiento inválido"
+
+    address = parse_mac(item.get("addr"))
+    if address is None:
+        return None, "Mac Address inválida"
+    if address not in index:
+        return None, "Mac Address no registrada"
+
+    rssi = item.get("rssi")
+    if isinstance(rssi, bool) or not isinstance(rssi, int) or not -127 <= rssi <= 20:
+        return None, "RSSI inválido"
+
+    ts = item.get("ts")
+    if isinstance(ts, bool) or not isinstance(ts, (int, float)):
+        return None, "Marca de tiempo inválida"
+    if ts > now + 300 or ts < now - MAX_SIGHTING_AGE:
+        return None, "Marca de tiempo fuera de rango"
+
+    attraction = index[address]
+    return {
+        "address": address,
+        "id_attraction": attraction.id if attraction else None,
+        "rssi": rssi,
+        "seen_at": datetime.datetime.utcfromtimestamp(ts),
+    }, None
+
+
+@mac_address_bp.route("/sightings", methods=["POST"])
+def create_sightings():
+    """
+    Registrar un lote de avistamientos de beacons
+    ---
+    parameters:
+      - name: data
+        in: body
+        required: true
+        description: Avistamientos reportados por el teléfono.
+        schema:
+          type: object
+          properties:
+            sightings:
+              type: array
+              items:
+                type: object
+                properties:
+                  addr:
+                    type: string
+                    description: Mac Address del beacon.
+                  rssi:
+                    type: integer
+                    description: Intensidad de la señal en dBm.
+                  ts:
+                    type: number
+                    description: Momento del avistamiento en segundos Unix (UTC).
+    responses:
+      202:
+        description: Avistamientos aceptados para guardarse en segundo plano.
+        schema:
+          type: object
+          properties:
+            accepted:
+              type: integer
+              description: Número de avistamientos aceptados.
+            rejected:
+              type: array
+              description: Avistamientos rechazados con su posición y el motivo.
+      400:
+        description: Lote vacío o demasiado grande.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      503:
+        description: El servidor está saturado, reintentar después de Retry-After.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al registrar los avistamientos.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        dataJson = request.get_json(silent=True)
+        if not isinstance(dataJson, dict):
+            return jsonify({"error": "Debe indicar al menos un avistamiento"}), 400
+        items = dataJson.get("sightings")
+
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "Debe indicar al menos un avistamiento"}), 400
+
+        if len(items) > MAX_SIGHTINGS_BATCH:
+            return jsonify({"error": "Se permiten como máximo {} avistamientos por lote".format(MAX_SIGHTINGS_BATCH)}), 400
+
+        index = mac_index.get_index()
+        now = datetime.datetime.utcnow().replace(tzinfo=datetime.timezone.utc).timestamp()
+
+        rows = []
+        rejected = []
+        for position, item in enumerate(items):
+            row, error = _parse_sighting(item, index, now)
+            if error:
+                rejected.append({"index": position, "error": error})
+            else:
+                rows.append(row)
+
+        if rows and not sightings.enqueue(rows):
+            response = jsonify({"error": "Servidor saturado, intente más tarde"})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+
+        for row in rows:
+            popularity.record_sighting(row["id_attraction"])
+
+        return jsonify({"accepted": len(rows), "rejected": rejected}), 202
+
+    except Exception as e:
+        return jsonify({"error": "Error al registrar los avistamientos: " + str(e)}), 500
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models.material import Material
 from app import db
+from services import cache_versions
+from services import change_log
+from services import suggest
 
 material_bp = Blueprint('material', __name__)
 
@@ -49,7 +52,9 @@ def create_material(data):
         new_material = Material(name=name)
 
         db.session.add(new_material)
+        change_log.record("material", new_material, "create")
         db.session.commit()
+        cache_versions.bump("material")
 
         return jsonify({'message': 'Material creado exitosamente'}), 200
 
@@ -219,7 +224,9 @@ def update_material(data, id):
             data = request.get_json()
             material.name = data.get('name')
 
+            change_log.record("material", material, "update")
             db.session.commit()
+            cache_versions.bump("material")
 
             return jsonify({'message': 'Material actualizado exitosamente'}), 200
         else:
@@ -273,7 +280,9 @@ def delete_material(data, id):
         if material:
             # Actualizar el campo is_delete a 1 (marcar como eliminado)
             material.is_delete = 1
+            change_log.record("material", material, "delete")
             db.session.commit()
+            cache_versions.bump("material")
 
             return jsonify({'message': 'Material eliminado exitosamente'})
         else:
@@ -281,3 +290,52 @@ def delete_material(data, id):
 
     except Exception as e:
         return jsonify({'error': 'Error al eliminar material: ' + str(e)}), 500
+
+
+@material_bp.route('/suggest', methods=['GET'])
+@jwt_required
+def suggest_materials(data):
+    """
+    Autocompletar materiales por prefijo
+    ---
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Inicio de cualquier palabra del nombre, sin distinguir acentos.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (10 por defecto, 50 como máximo).
+    responses:
+      200:
+        description: Lista de materiales que coinciden.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: identificador.
+              name:
+                type: string
+                description: nombre del elemento.
+      500:
+        description: Error al buscar materiales.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error."""
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+        return jsonify(suggest.materials.suggest(prefix, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Error al buscar los materiales: ' + str(e)}), 500
@@ -2,6 +2,9 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify
 from models.style import Style
 from app import db
+from services import cache_versions
+from services import change_log
+from services import suggest
 
 style_bp = Blueprint('style', __name__)
 
@@ -48,7 +51,9 @@ def create_style(data):
         new_style = Style(name=name)
 
         db.session.add(new_style)
+        change_log.record("style", new_style, "create")
         db.session.commit()
+        cache_versions.bump("style")
 
         return jsonify({'message': 'Estilo creado exitosamente'}), 200
 
@@ -202,7 +207,9 @@ def update_style(data, id):
         if style:
             data = request.get_json()
             style.name = data.get('name')
+            change_log.record("style", style, "update")
             db.session.commit()
+            cache_versions.bump("style")
 
             return jsonify({'message': 'Estilo actualizado exitosamente'}), 200
         else:
@@ -251,8 +258,59 @@ def delete_style(data, id):
         
         # Actualizar el campo is_delete a 1 (marcar como eliminado)
         style.is_delete = 1
+        change_log.record("style", style, "delete")
         db.session.commit()
+        cache_versions.bump("style")
         return jsonify({'message': 'Estilo eliminado exitosamente'}), 200
 
     except Exception as e:
         return jsonify({'error': 'Error al eliminar el estilo: ' + str(e)}), 500
+
+
+@style_bp.route('/suggest', methods=['GET'])
+@jwt_required
+def suggest_styles(data):
+    """
+    Autocompletar estilos por prefijo
+    ---
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Inicio de cualquier palabra del nombre, sin distinguir acentos.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (10 por defecto, 50 como máximo).
+    responses:
+      200:
+        description: Lista de estilos que coinciden.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: identificador.
+              name:
+                type: string
+                description: nombre del elemento.
+      500:
+        description: Error al buscar estilos.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error."""
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+        return jsonify(suggest.styles.suggest(prefix, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Error al buscar los estilos: ' + str(e)}), 500
@@ -0,0 +1,233 @@
+import datetime
+import os
+from flask import Blueprint, request, jsonify, send_file
+from decouple import config
+from models.change_log import ChangeLog
+from models.attraction import Attraction
+from models.detailMaterial import DetailMaterial
+from models.detailTecnique import DetailTecnique
+from models.category import Category
+from models.author import Author
+from models.style import Style
+from models.material import Material
+from models.tecnique import Tecnique
+from services import bundle
+
+sync_bp = Blueprint("sync", __name__)
+
+MAX_CHANGES = config("SYNC_MAX_CHANGES", default=1000, cast=int)
+SETTLE_SECONDS = bundle.SETTLE_SECONDS
+
+
+def _lookup_info(row):
+    return {"id": row.id, "name": row.name, "is_delete": bool(row.is_delete)}
+
+
+def _category_info(category):
+    return {
+        "id": category.id,
+        "name": category.name,
+        "description": category.description,
+        "is_delete": bool(category.is_delete),
+    }
+
+
+def _author_info(author):
+    return {
+        "id": author.id,
+        "name": author.name,
+        "father_lastname": author.father_lastname,
+        "mother_lastname": author.mother_lastname,
+        "is_delete": bool(author.is_delete),
+    }
+
+
+def _attractions_info(attractions):
+    ids = [attraction.id for attraction in attractions]
+    materials = {}
+    tecnicas = {}
+    if ids:
+        for detail in DetailMaterial.query.filter(DetailMaterial.id_attraction.in_(ids)).all():
+            materials.setdefault(detail.id_attraction, []).append(detail.id_material)
+        for detail in DetailTecnique.query.filter(DetailTecnique.id_attraction.in_(ids)).all():
+            tecnicas.setdefault(detail.id_attraction, []).append(detail.id_tecnique)
+
+    return [
+        {
+            "id": attraction.id,
+            "name": attraction.name,
+            "lat": attraction.lat,
+            "lng": attraction.lng,
+            "description": attraction.description,
+            "img": attraction.img,
+            "size": attraction.size,
+            "id_author": attraction.id_author,
+            "id_style": attraction.id_style,
+            "id_category": attraction.id_category,
+            "materials": materials.get(attraction.id, []),
+            "tecnicas": tecnicas.get(attraction.id, []),
+            "is_delete": bool(attraction.is_delete),
+        }
+        for attraction in attractions
+    ]
+
+
+# entidad del registro de cambios -> (clave de la respuesta, modelo, serializador)
+ENTITIES = {
+    "attraction": ("attractions", Attraction, None),
+    "category": ("categories", Category, _category_info),
+    "author": ("authors", Author, _author_info),
+    "style": ("styles", Style, _lookup_info),
+    "material": ("materials", Material, _lookup_info),
+    "tecnique": ("tecniques", Tecnique, _lookup_info),
+}
+
+
+def _serialize(entity, rows):
+    _, _, serializer = ENTITIES[entity]
+    if entity == "attraction":
+        return _attractions_info(rows)
+    return [serializer(row) for row in rows]
+
+
+@sync_bp.route("/", methods=["GET"])
+def sync():
+    """
+    Obtener los cambios del catálogo desde la última sincronización
+    ---
+    parameters:
+      - name: since
+        in: query
+        type: integer
+        required: false
+        description: Token devuelto por la sincronización anterior. Si se omite o es 0 se devuelve el catálogo completo.
+    responses:
+      200:
+        description: Registros creados, actualizados o eliminados (is_delete) desde el token.
+        schema:
+          type: object
+          properties:
+            token:
+              type: integer
+              description: Token para la siguiente sincronización.
+            has_more:
+              type: boolean
+              description: Indica si quedan cambios; volver a llamar con el nuevo token.
+            attractions:
+              type: array
+              description: Atracciones con los IDs de sus materiales y técnicas.
+            categories:
+              type: array
+              description: Categorías.
+            authors:
+              type: array
+              description: Autores.
+            styles:
+              type: array
+              description: Estilos.
+            materials:
+              type: array
+              description: Materiales.
+            tecniques:
+              type: array
+              description: Técnicas.
+      400:
+        description: Token inválido.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+      500:
+        description: Error al sincronizar.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    try:
+        try:
+            since = int(request.args.get("since", 0))
+        except ValueError:
+            return jsonify({"error": "Token inválido"}), 400
+        if since < 0:
+            return jsonify({"error": "Token inválido"}), 400
+
+        response = {key: [] for key, _, _ in ENTITIES.values()}
+        settled = datetime.datetime.utcnow() - datetime.timedelta(seconds=SETTLE_SECONDS)
+
+        if since == 0:
+            # Primera sincronización: todo el catálogo vigente
+            token = bundle.settled_version()
+            for entity, (key, model, _) in ENTITIES.items():
+                rows = model.query.filter(model.is_delete == 0).all()
+                response[key] = _serialize(entity, rows)
+            response["token"] = token
+            response["has_more"] = False
+            return jsonify(response), 200
+
+        changes = (
+            ChangeLog.query.filter(ChangeLog.id > since, ChangeLog.create_at <= settled)
+            .order_by(ChangeLog.id)
+            .limit(MAX_CHANGES + 1)
+            .all()
+        )
+        has_more = len(changes) > MAX_CHANGES
+        changes = changes[:MAX_CHANGES]
+
+        changed_ids = {}
+        for change in changes:
+            if change.entity in ENTITIES:
+                changed_ids.setdefault(change.entity, set()).add(change.entity_id)
+
+        for entity, ids in changed_ids.items():
+            key, model, _ = ENTITIES[entity]
+            rows = model.query.filter(model.id.in_(ids)).order_by(model.id).all()
+            response[key] = _serialize(entity, rows)
+
+        response["token"] = changes[-1].id if changes else since
+        response["has_more"] = has_more
+        return jsonify(response), 200
+
+    except Exception as e:
+        return jsonify({"error": "Error al sincronizar: " + str(e)}), 500
+
+
+@sync_bp.route("/bundle", methods=["GET"])
+def get_bundle():
+    """
+    Descargar el paquete del catálogo para uso sin conexión
+    ---
+    responses:
+      200:
+        description: Base SQLite comprimida con gzip. Admite descargas parciales con Range y la cabecera X-Catalog-Version indica el token para continuar con /sync.
+      206:
+        description: Parte del paquete solicitada con Range.
+      404:
+        description: Todavía no se ha generado el paquete.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error.
+    """
+    manifest = bundle.read_manifest()
+    if manifest is None or not os.path.exists(manifest["path"]):
+        return jsonify({"error": "Paquete del catálogo no disponible"}), 404
+
+    version = manifest["version"]
+    response = send_file(
+        manifest["path"],
+        mimetype="application/gzip",
+        as_attachment=True,
+        download_name="catalog-{}.sqlite.gz".format(version),
+        conditional=True,
+        etag=manifest["etag"],
+        max_age=0,
+    )
+    response.headers["X-Catalog-Version"] = version
+    return response
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from models.tecnique import Tecnique
 from app import db
+from services import cache_versions
+from services import change_log
+from services import suggest
 
 tecnique_bp = Blueprint('tecnique', __name__)
 
@@ -48,7 +51,9 @@ def create_tecnique(data):
         new_tecnique = Tecnique(name=name)
 
         db.session.add(new_tecnique)
+        change_log.record("tecnique", new_tecnique, "create")
         db.session.commit()
+        cache_versions.bump("tecnique")
 
         return jsonify({'message': 'Tecnique creado exitosamente'}), 200
 
@@ -219,7 +224,9 @@ def update_tecnique(data, id):
             data = request.get_json()
             tecnique.name = data.get('name')
 
+            change_log.record("tecnique", tecnique, "update")
             db.session.commit()
+            cache_versions.bump("tecnique")
 
             return jsonify({'message': 'Tecnique actualizado exitosamente'}), 200
         else:
@@ -273,7 +280,9 @@ def delete_tecnique(data, id):
         if tecnique:
             # Actualizar el campo is_delete a 1 (marcar como eliminado)
             tecnique.is_delete = 1
+            change_log.record("tecnique", tecnique, "delete")
             db.session.commit()
+            cache_versions.bump("tecnique")
 
             return jsonify({'message': 'Tecnique eliminado exitosamente'})
         else:
@@ -281,3 +290,52 @@ def delete_tecnique(data, id):
 
     except Exception as e:
         return jsonify({'error': 'Error al eliminar tecnique: ' + str(e)}), 500
+
+
+@tecnique_bp.route('/suggest', methods=['GET'])
+@jwt_required
+def suggest_tecniques(data):
+    """
+    Autocompletar técnicas por prefijo
+    ---
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Inicio de cualquier palabra del nombre, sin distinguir acentos.
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Número máximo de resultados (10 por defecto, 50 como máximo).
+    responses:
+      200:
+        description: Lista de técnicas que coinciden.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                description: identificador.
+              name:
+                type: string
+                description: nombre del elemento.
+      500:
+        description: Error al buscar técnicas.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: Mensaje de error."""
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+        return jsonify(suggest.tecniques.suggest(prefix, limit)), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Error al buscar las técnicas: ' + str(e)}), 500
@@ -0,0 +1,196 @@
+"""Paquete del catálogo para usar sin conexión.
+
+Es una base SQLite comprimida con gzip que incluye atracciones, categorías,
+nombres de las tablas de referencia, coordenadas y miniaturas. La versión
+es el último ID del registro de cambios, así el cliente puede seguir con
+/sync?since=<versión> después de instalarlo.
+
+Cada paquete se guarda con el hash de su contenido en el nombre y el archivo
+.version apunta al vigente; como ese archivo se reemplaza de una sola vez,
+quien lo lee nunca ve una versión que no corresponda al paquete.
+"""
+import datetime
+import glob
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from decouple import config
+from sqlalchemy import func
+
+from app import db
+from services import images
+from models.attraction import Attraction
+from models.detailMaterial import DetailMaterial
+from models.detailTecnique import DetailTecnique
+from models.category import Category
+from models.author import Author
+from models.style import Style
+from models.material import Material
+from models.tecnique import Tecnique
+from models.change_log import ChangeLog
+
+BUNDLE_PATH = os.path.abspath(config("CATALOG_BUNDLE_PATH", default="catalog.sqlite.gz"))
+# Los cambios más recientes que esto se dejan para la siguiente sincronización,
+# para no saltarse un ID menor cuya transacción todavía no terminó.
+SETTLE_SECONDS = config("SYNC_SETTLE_SECONDS", default=2, cast=int)
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE category (id INTEGER PRIMARY KEY, name TEXT, description TEXT);
+CREATE TABLE author (id INTEGER PRIMARY KEY, name TEXT, father_lastname TEXT, mother_lastname TEXT);
+CREATE TABLE style (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE material (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE tecnique (id INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE attraction (
+    id INTEGER PRIMARY KEY, name TEXT, lat REAL, lng REAL, description TEXT,
+    size INTEGER, id_category INTEGER, id_author INTEGER, id_style INTEGER,
+    img TEXT, thumbnails TEXT
+);
+CREATE TABLE attraction_material (id_attraction INTEGER, id_material INTEGER);
+CREATE TABLE attraction_tecnique (id_attraction INTEGER, id_tecnique INTEGER);
+CREATE INDEX ix_attraction_category ON attraction (id_category);
+CREATE INDEX ix_attraction_material ON attraction_material (id_attraction);
+CREATE INDEX ix_attraction_tecnique ON attraction_tecnique (id_attraction);
+"""
+
+
+def version_path(path):
+    return path + ".version"
+
+
+def read_manifest(path=BUNDLE_PATH):
+    """Devuelve {"version", "etag", "path"} del paquete vigente o None."""
+    try:
+        with open(version_path(path), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or not all(key in manifest for key in ("version", "etag", "file")):
+        return None
+    return {
+        "version": str(manifest["version"]),
+        "etag": manifest["etag"],
+        "path": os.path.join(os.path.dirname(path), os.path.basename(manifest["file"])),
+    }
+
+
+def settled_version():
+    """Último ID del registro de cambios cuya transacción ya debería haber terminado."""
+    settled = datetime.datetime.utcnow() - datetime.timedelta(seconds=SETTLE_SECONDS)
+    return (
+        db.session.query(func.max(ChangeLog.id))
+        .filter(ChangeLog.create_at <= settled)
+        .scalar()
+        or 0
+    )
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_manifest(path, manifest):
+    tmp_path = version_path(path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, version_path(path))
+
+
+def _remove_stale(path, keep):
+    """Borra los paquetes viejos, dejando el anterior para descargas en curso."""
+    for candidate in glob.glob(glob.escape(path) + ".*"):
+        if candidate in keep or candidate.endswith((".version", ".tmp")):
+            continue
+        try:
+            os.remove(candidate)
+        except OSError:
+            pass
+
+
+def _lookup_rows(model):
+    return [(row.id, row.name) for row in model.query.filter(model.is_delete == 0).all()]
+
+
+def export_bundle(path=BUNDLE_PATH):
+    """Genera el paquete en path y devuelve (versión, atracciones)."""
+    version = settled_version()
+    attractions = Attraction.query.filter(Attraction.is_delete == 0).all()
+    ids = {attraction.id for attraction in attractions}
+
+    directory = os.path.dirname(path) or "."
+    fd, sqlite_path = tempfile.mkstemp(suffix=".sqlite", dir=directory)
+    os.close(fd)
+    try:
+        connection = sqlite3.connect(sqlite_path)
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(version)),
+                ("format", "1"),
+            ])
+            connection.executemany("INSERT INTO category VALUES (?, ?, ?)", [
+                (row.id, row.name, row.description)
+                for row in Category.query.filter(Category.is_delete == 0).all()
+            ])
+            connection.executemany("INSERT INTO author VALUES (?, ?, ?, ?)", [
+                (row.id, row.name, row.father_lastname, row.mother_lastname)
+                for row in Author.query.filter(Author.is_delete == 0).all()
+            ])
+            connection.executemany("INSERT INTO style VALUES (?, ?)", _lookup_rows(Style))
+            connection.executemany("INSERT INTO material VALUES (?, ?)", _lookup_rows(Material))
+            connection.executemany("INSERT INTO tecnique VALUES (?, ?)", _lookup_rows(Tecnique))
+            connection.executemany("INSERT INTO attraction VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+                (
+                    row.id, row.name, row.lat, row.lng, row.description, row.size,
+                    row.id_category, row.id_author, row.id_style,
+                    json.dumps(row.img),
+                    json.dumps([images.thumbnail_url(url) for url in images.image_urls(row.img)]),
+                )
+                for row in attractions
+            ])
+            connection.executemany("INSERT INTO attraction_material VALUES (?, ?)", [
+                (row.id_attraction, row.id_material)
+                for row in DetailMaterial.query.all() if row.id_attraction in ids
+            ])
+            connection.executemany("INSERT INTO attraction_tecnique VALUES (?, ?)", [
+                (row.id_attraction, row.id_tecnique)
+                for row in DetailTecnique.query.all() if row.id_attraction in ids
+            ])
+        connection.execute("VACUUM")
+        connection.close()
+
+        # mtime=0 y sin nombre en la cabecera: el mismo catálogo da los mismos bytes
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as raw:
+                with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as target:
+                    with open(sqlite_path, "rb") as source:
+                        shutil.copyfileobj(source, target)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.chmod(tmp_path, 0o644)
+            etag = _file_digest(tmp_path)
+            bundle_path = "{}.{}".format(path, etag[:16])
+            os.replace(tmp_path, bundle_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        previous = read_manifest(path)
+        _write_manifest(path, {"version": version, "etag": etag, "file": os.path.basename(bundle_path)})
+        _remove_stale(path, {bundle_path, previous["path"] if previous else None})
+    finally:
+        os.remove(sqlite_path)
+
+    return version, len(attractions)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from decouple import config
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from services import db_routing
+from models.cache_version import CacheVersion
+
+# Cada cuántos segundos se consulta la tabla cache_version para detectar
+# cambios hechos por otros workers.
+POLL_SECONDS = config("CACHE_VERSION_POLL_SECONDS", default=5, cast=float)
+
+_lock = threading.Lock()
+_local = {}
+_remote = {}
+# Tablas con cambios de este proceso que no llegaron a cache_version
+_unsynced = set()
+_last_poll = 0.0
+
+
+@db_routing.primary_reads
+def _poll():
+    """Actualiza las versiones remotas si ya pasó el intervalo de consulta."""
+    global _last_poll
+    now = time.monotonic()
+    if now - _last_poll < POLL_SECONDS:
+        return
+    _last_poll = now
+    try:
+        rows = CacheVersion.query.all()
+    except SQLAlchemyError:
+        # Sin tabla de versiones la invalidación queda solo dentro del proceso
+        db.session.rollback()
+        return
+    with _lock:
+        for row in rows:
+            _remote[row.name] = row.version
+
+
+def current(name):
+    """Devuelve la versión actual de una tabla (remota, local)."""
+    _poll()
+    with _lock:
+        return (_remote.get(name, 0), _local.get(name, 0))
+
+
+def shared(name):
+    """Versión remota de una tabla, la misma en todos los workers.
+
+    Devuelve None si este proceso tiene cambios que no se pudieron registrar
+    en la base de datos, porque entonces la versión remota no los refleja.
+    """
+    _poll()
+    with _lock:
+        if name in _unsynced:
+            return None
+        return _remote.get(name, 0)
+
+
+def bump(name):
+    """Marca una tabla como modificada en este proceso y en la base de datos."""
+    with _lock:
+        _local[name] = _local.get(name, 0) + 1
+    try:
+        updated = CacheVersion.query.filter(CacheVersion.name == name).update(
+            {CacheVersion.version: CacheVersion.version + 1}
+        )
+        if not updated:
+            db.session.add(CacheVersion(name=name, version=1))
+        db.session.commit()
+        row = CacheVersion.query.get(name)
+    except SQLAlchemyError:
+        db.session.rollback()
+        with _lock:
+            _unsynced.add(name)
+        return
+    # Se adopta la nueva versión remota para no recargar por un cambio propio
+    with _lock:
+        _unsynced.discard(name)
+        if row is not None and row.version > _remote.get(name, 0):
+            _remote[name] = row.version
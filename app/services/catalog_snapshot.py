@@ -0,0 +1,248 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+
+from decouple import config
+
+# Ruta del snapshot que comparten los workers de solo lectura. Si está vacía
+# las rutas públicas consultan la base de datos como siempre.
+SNAPSHOT_PATH = config("CATALOG_SNAPSHOT_PATH", default="")
+
+MAGIC = b"SAMCAT02"
+# magic, atracciones, categorías, cadenas
+HEADER = struct.Struct("<8sIII")
+HEADER_SIZE = 32
+NO_SIZE = -(2 ** 31)
+# Índice de cadena que representa None, para no confundirlo con ""
+NO_STRING = 2 ** 32 - 1
+
+
+class AttractionRecord:
+    """Atracción leída del snapshot, sin pasar por el ORM."""
+
+    __slots__ = ("id", "name", "lat", "lng", "description", "img", "size", "id_category")
+
+    def __init__(self, id, name, lat, lng, description, img, size, id_category):
+        self.id = id
+        self.name = name
+        self.lat = lat
+        self.lng = lng
+        self.description = description
+        self.img = img
+        self.size = size
+        self.id_category = id_category
+
+
+class CategoryRecord:
+    """Categoría leída del snapshot."""
+
+    __slots__ = ("id", "name", "description", "is_delete")
+
+    def __init__(self, id, name, description, is_delete):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.is_delete = is_delete
+
+
+def _layout(n_attr, n_cat, n_str):
+    """Calcula el desplazamiento de cada arreglo dentro del archivo.
+
+    Los arreglos de 8 bytes van primero para que queden alineados.
+    """
+    sections = [
+        ("lat", "d", n_attr),
+        ("lng", "d", n_attr),
+        ("str_offsets", "Q", n_str + 1),
+        ("id", "i", n_attr),
+        ("id_category", "i", n_attr),
+        ("size", "i", n_attr),
+        ("name", "I", n_attr),
+        ("description", "I", n_attr),
+        ("img", "I", n_attr),
+        ("cat_id", "i", n_cat),
+        ("cat_name", "I", n_cat),
+        ("cat_description", "I", n_cat),
+        ("cat_deleted", "B", n_cat),
+    ]
+    offsets = {}
+    position = HEADER_SIZE
+    for name, typecode, count in sections:
+        offsets[name] = (position, typecode, count)
+        position += array(typecode).itemsize * count
+    return offsets, position
+
+
+class _StringTable:
+    """Tabla de cadenas internadas: cada texto repetido se guarda una vez."""
+
+    def __init__(self):
+        self.index = {}
+        self.values = []
+
+    def add(self, value):
+        if value is None:
+            return NO_STRING
+        if value not in self.index:
+            self.index[value] = len(self.values)
+            self.values.append(value)
+        return self.index[value]
+
+
+def build_snapshot(path):
+    """Genera el snapshot del catálogo a partir de Attraction y Category."""
+    from models.attraction import Attraction
+    from models.category import Category
+
+    attractions = (
+        Attraction.query.filter(Attraction.is_delete == 0)
+        .order_by(Attraction.id_category, Attraction.id)
+        .all()
+    )
+    categories = Category.query.order_by(Category.id).all()
+
+    strings = _StringTable()
+    columns = {name: array(typecode) for name, typecode in (
+        ("lat", "d"), ("lng", "d"), ("id", "i"), ("id_category", "i"),
+        ("size", "i"), ("name", "I"), ("description", "I"), ("img", "I"),
+        ("cat_id", "i"), ("cat_name", "I"), ("cat_description", "I"),
+        ("cat_deleted", "B"),
+    )}
+
+    for attraction in attractions:
+        columns["id"].append(attraction.id)
+        columns["lat"].append(attraction.lat if attraction.lat is not None else float("nan"))
+        columns["lng"].append(attraction.lng if attraction.lng is not None else float("nan"))
+        columns["id_category"].append(attraction.id_category or 0)
+        columns["size"].append(attraction.size if attraction.size is not None else NO_SIZE)
+        columns["name"].append(strings.add(attraction.name))
+        columns["description"].append(strings.add(attraction.description))
+        columns["img"].append(strings.add(json.dumps(attraction.img)))
+
+    for category in categories:
+        columns["cat_id"].append(category.id)
+        columns["cat_name"].append(strings.add(category.name))
+        columns["cat_description"].append(strings.add(category.description))
+        columns["cat_deleted"].append(1 if category.is_delete else 0)
+
+    blob = bytearray()
+    columns["str_offsets"] = array("Q", [0])
+    for value in strings.values:
+        blob += value.encode("utf-8")
+        columns["str_offsets"].append(len(blob))
+
+    offsets, _ = _layout(len(attractions), len(categories), len(strings.values))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        header = HEADER.pack(MAGIC, len(attractions), len(categories), len(strings.values))
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for name, (position, _, _) in sorted(offsets.items(), key=lambda item: item[1][0]):
+            if f.tell() != position:
+                raise RuntimeError(
+                    "Snapshot de catálogo desalineado en {}: {} en lugar de {}".format(name, f.tell(), position)
+                )
+            columns[name].tofile(f)
+        f.write(blob)
+    # Reemplazo atómico para que los workers nunca lean un archivo a medias
+    os.replace(tmp_path, path)
+    return len(attractions), len(categories), len(strings.values)
+
+
+class CatalogSnapshot:
+    """Vista de solo lectura sobre un snapshot mapeado en memoria.
+
+    Los arreglos son memoryviews sobre el mmap, así que las páginas se
+    comparten entre workers y no se crean objetos hasta que se piden.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime_ns
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_attr, n_cat, n_str = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError("Snapshot de catálogo inválido: " + path)
+        self.attraction_count = n_attr
+        self.category_count = n_cat
+        offsets, blob_start = _layout(n_attr, n_cat, n_str)
+        view = memoryview(self._mmap)
+        for name, (position, typecode, count) in offsets.items():
+            size = array(typecode).itemsize * count
+            setattr(self, "_" + name, view[position:position + size].cast(typecode))
+        self._blob = view[blob_start:]
+
+    def string(self, index):
+        if index == NO_STRING:
+            return None
+        start = self._str_offsets[index]
+        end = self._str_offsets[index + 1]
+        return str(self._blob[start:end], "utf-8")
+
+    def attraction(self, i):
+        size = self._size[i]
+        lat = self._lat[i]
+        lng = self._lng[i]
+        return AttractionRecord(
+            self._id[i],
+            self.string(self._name[i]),
+            None if lat != lat else lat,
+            None if lng != lng else lng,
+            self.string(self._description[i]),
+            json.loads(self.string(self._img[i])),
+            None if size == NO_SIZE else size,
+            self._id_category[i],
+        )
+
+    def attractions(self, id_category=None):
+        """Recorre las atracciones, opcionalmente de una sola categoría."""
+        for i in range(self.attraction_count):
+            if id_category is None or self._id_category[i] == id_category:
+                yield self.attraction(i)
+
+    def category(self, id):
+        for i in range(self.category_count):
+            if self._cat_id[i] == id:
+                return self._category(i)
+        return None
+
+    def categories(self, include_deleted=False):
+        for i in range(self.category_count):
+            if include_deleted or not self._cat_deleted[i]:
+                yield self._category(i)
+
+    def _category(self, i):
+        return CategoryRecord(
+            self._cat_id[i],
+            self.string(self._cat_name[i]),
+            self.string(self._cat_description[i]),
+            bool(self._cat_deleted[i]),
+        )
+
+
+_lock = threading.Lock()
+_current = None
+_current_mtime = None
+
+
+def get_snapshot():
+    """Devuelve el snapshot configurado o None si no hay uno disponible.
+
+    Se vuelve a mapear cuando el archivo cambia en disco.
+    """
+    global _current, _current_mtime
+    if not SNAPSHOT_PATH:
+        return None
+    try:
+        mtime = os.stat(SNAPSHOT_PATH).st_mtime_ns
+    except OSError:
+        return None
+    if _current is not None and _current_mtime == mtime:
+        return _current
+    with _lock:
+        if _current is None or _current_mtime != mtime:
+            _current = CatalogSnapshot(SNAPSHOT_PATH)
+            _current_mtime = mtime
+        return _current
@@ -0,0 +1,14 @@
+from app import db
+from models.change_log import ChangeLog
+
+
+def record(entity, instance, op):
+    """Agrega al registro de cambios la operación sobre instance.
+
+    Se llama antes del commit del handler para que el cambio y su registro
+    se guarden en la misma transacción.
+    """
+    if instance.id is None:
+        # En las altas hace falta el ID generado por la base de datos
+        db.session.flush()
+    db.session.add(ChangeLog(entity=entity, entity_id=instance.id, op=op))
@@ -0,0 +1,187 @@
+"""Agrupación de atracciones por nivel de zoom del mapa.
+
+Para cada zoom el mundo se divide, en coordenadas Web Mercator, en una
+cuadrícula de CLUSTER_CELLS_PER_TILE x CLUSTER_CELLS_PER_TILE celdas por
+mosaico. Cada celda guarda cuántas atracciones tiene y la suma de sus
+coordenadas para el centroide. Los niveles se construyen una vez desde los
+puntos en memoria y se actualizan de forma incremental en cada escritura.
+"""
+import math
+import threading
+
+from decouple import config
+
+from services import cache_versions
+from services import catalog_snapshot
+from services import db_routing
+from services import nearby
+from models.attraction import Attraction
+
+MAX_ZOOM = config("CLUSTER_MAX_ZOOM", default=16, cast=int)
+# Con mosaicos de 256 px, 4 celdas por mosaico son grupos de unos 64 px
+CELLS_PER_TILE = config("CLUSTER_CELLS_PER_TILE", default=4, cast=int)
+# Límite de latitud de la proyección Web Mercator
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def _x(lng):
+    return (lng + 180.0) / 360.0
+
+
+def _y(lat):
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    sin = math.sin(math.radians(lat))
+    return 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+
+
+class _Cell:
+    __slots__ = ("count", "sum_lat", "sum_lng", "ids")
+
+    def __init__(self):
+        self.count = 0
+        self.sum_lat = 0.0
+        self.sum_lng = 0.0
+        self.ids = set()
+
+
+class ClusterIndex:
+    def __init__(self, max_zoom=MAX_ZOOM, cells_per_tile=CELLS_PER_TILE):
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.levels = [{} for _ in range(max_zoom + 1)]
+        self.positions = {}
+
+    def _size(self, zoom):
+        return self.cells_per_tile << zoom
+
+    def _cell(self, zoom, x, y):
+        size = self._size(zoom)
+        return (min(int(x * size), size - 1), min(int(y * size), size - 1))
+
+    def add(self, id, lat, lng):
+        x, y = _x(lng), _y(lat)
+        self.positions[id] = (lat, lng, x, y)
+        for zoom, level in enumerate(self.levels):
+            cell = level.get(self._cell(zoom, x, y))
+            if cell is None:
+                cell = level[self._cell(zoom, x, y)] = _Cell()
+            cell.count += 1
+            cell.sum_lat += lat
+            cell.sum_lng += lng
+            cell.ids.add(id)
+
+    def remove(self, id):
+        position = self.positions.pop(id, None)
+        if position is None:
+            return
+        lat, lng, x, y = position
+        for zoom, level in enumerate(self.levels):
+            key = self._cell(zoom, x, y)
+            cell = level[key]
+            cell.count -= 1
+            cell.ids.discard(id)
+            if cell.count == 0:
+                del level[key]
+            else:
+                cell.sum_lat -= lat
+                cell.sum_lng -= lng
+
+    def _ranges(self, zoom, min_lat, min_lng, max_lat, max_lng):
+        # Una caja que cruza el antimeridiano se parte en dos
+        if min_lng > max_lng:
+            lng_ranges = ((min_lng, 180.0), (-180.0, max_lng))
+        else:
+            lng_ranges = ((min_lng, max_lng),)
+        # En Mercator la y crece hacia el sur
+        _, row_min = self._cell(zoom, 0.0, _y(max_lat))
+        _, row_max = self._cell(zoom, 0.0, _y(min_lat))
+        for west, east in lng_ranges:
+            col_min, _ = self._cell(zoom, _x(west), 0.0)
+            col_max, _ = self._cell(zoom, _x(east), 0.0)
+            yield col_min, col_max, row_min, row_max
+
+    def query(self, min_lat, min_lng, max_lat, max_lng, zoom):
+        """Celdas con atracciones dentro de la caja para el zoom pedido."""
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        level = self.levels[zoom]
+        result = []
+        for col_min, col_max, row_min, row_max in self._ranges(zoom, min_lat, min_lng, max_lat, max_lng):
+            area = (col_max - col_min + 1) * (row_max - row_min + 1)
+            if area <= len(level):
+                keys = (
+                    (col, row)
+                    for col in range(col_min, col_max + 1)
+                    for row in range(row_min, row_max + 1)
+                )
+                cells = ((key, level.get(key)) for key in keys)
+            else:
+                cells = (
+                    (key, cell) for key, cell in level.items()
+                    if col_min <= key[0] <= col_max and row_min <= key[1] <= row_max
+                )
+            for _, cell in cells:
+                if cell is not None:
+                    result.append(cell)
+        return result
+
+
+_lock = threading.Lock()
+_index = None
+_version = None
+
+
+def _current_version():
+    snapshot = catalog_snapshot.get_snapshot()
+    return (cache_versions.current("attraction"), snapshot.mtime if snapshot is not None else None)
+
+
+def _build():
+    index = ClusterIndex()
+    for point in nearby.get_points():
+        index.add(point.id, point.lat, point.lng)
+    return index
+
+
+def get_index():
+    global _index, _version
+    version = _current_version()
+    if _index is not None and _version == version:
+        return _index
+    with _lock:
+        if _index is None or _version != version:
+            _index = _build()
+            _version = version
+        return _index
+
+
+@db_routing.primary_reads
+def update(id_attraction):
+    """Mueve una sola atracción después de crearla, editarla o borrarla."""
+    global _version
+    with _lock:
+        if _index is None:
+            return
+        _index.remove(id_attraction)
+        attraction = Attraction.query.get(id_attraction)
+        if attraction is not None and not attraction.is_delete and attraction.is_geolocated:
+            _index.add(attraction.id, attraction.lat, attraction.lng)
+        # Igual que en search_index: solo se conserva si no hubo otros cambios
+        version = _current_version()
+        (old_remote, old_local), (new_remote, new_local) = _version[0], version[0]
+        if version[1:] == _version[1:] and new_local - old_local == 1 and new_remote - old_remote <= 1:
+            _version = version
+
+
+def clusters(min_lat, min_lng, max_lat, max_lng, zoom):
+    """Grupos dentro de la caja como diccionarios listos para JSON."""
+    index = get_index()
+    result = []
+    with _lock:
+        for cell in index.query(min_lat, min_lng, max_lat, max_lng, zoom):
+            result.append({
+                "lat": cell.sum_lat / cell.count,
+                "lng": cell.sum_lng / cell.count,
+                "count": cell.count,
+                "id": next(iter(cell.ids)) if cell.count == 1 else None,
+            })
+    return result
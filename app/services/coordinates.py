@@ -0,0 +1,95 @@
+"""Validación de las coordenadas de las atracciones."""
+import math
+
+from decouple import config, Csv
+
+# Caja esperada "min_lat,min_lng,max_lat,max_lng" para detectar ejes invertidos
+EXPECTED_BBOX = config("COORDINATE_EXPECTED_BBOX", default="", cast=Csv(float))
+
+
+class CoordinateError(ValueError):
+    """Coordenadas que no se pueden guardar; el mensaje es para el cliente."""
+
+
+def _number(value, name):
+    if value is None or value == "":
+        raise CoordinateError("Falta {}".format(name))
+    if isinstance(value, bool):
+        raise CoordinateError("{} debe ser un número".format(name))
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise CoordinateError("{} debe ser un número".format(name))
+    if not math.isfinite(number):
+        raise CoordinateError("{} debe ser un número finito".format(name))
+    return number
+
+
+def _in_range(lat, lng):
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def _in_expected(lat, lng):
+    if len(EXPECTED_BBOX) != 4:
+        return True
+    min_lat, min_lng, max_lat, max_lng = EXPECTED_BBOX
+    return min_lat <= lat <= max_lat and min_lng <= lng <= max_lng
+
+
+def check(lat, lng):
+    """Clasifica un par de coordenadas.
+
+    Devuelve ("ok", (lat, lng)), ("swapped", (lng, lat)) si solo tienen
+    sentido con los ejes invertidos, o ("invalid", mensaje).
+    """
+    try:
+        lat = _number(lat, "lat")
+        lng = _number(lng, "lng")
+    except CoordinateError as e:
+        return "invalid", str(e)
+
+    if lat == 0 and lng == 0:
+        # Valor por omisión de muchos clientes cuando no hay ubicación
+        return "invalid", "Las coordenadas (0, 0) no son una ubicación válida"
+    if _in_range(lat, lng) and _in_expected(lat, lng):
+        return "ok", (lat, lng)
+
+    swapped_fits = _in_range(lng, lat)
+    if len(EXPECTED_BBOX) == 4:
+        swapped_fits = swapped_fits and _in_expected(lng, lat)
+    else:
+        # Sin zona esperada solo se detecta cuando la latitud no cabe en su rango
+        swapped_fits = swapped_fits and not -90 <= lat <= 90
+    if swapped_fits:
+        return "swapped", (lng, lat)
+
+    if not _in_range(lat, lng):
+        return "invalid", "lat debe estar entre -90 y 90 y lng entre -180 y 180"
+    return "invalid", "Las coordenadas están fuera de la zona esperada"
+
+
+def validate(lat, lng):
+    """Devuelve (lat, lng) como flotantes o lanza CoordinateError."""
+    status, result = check(lat, lng)
+    if status == "swapped":
+        raise CoordinateError("lat y lng parecen estar invertidas")
+    if status == "invalid":
+        raise CoordinateError(result)
+    return result
+
+
+def is_valid(lat, lng):
+    return check(lat, lng)[0] == "ok"
+
+
+def parse_point(lat, lng):
+    """Posición de consulta (la del usuario) como flotantes o CoordinateError.
+
+    Solo exige números finitos dentro del rango; la zona esperada, (0, 0) y
+    los ejes invertidos son reglas para guardar atracciones, no para buscar.
+    """
+    lat = _number(lat, "lat")
+    lng = _number(lng, "lng")
+    if not _in_range(lat, lng):
+        raise CoordinateError("lat debe estar entre -90 y 90 y lng entre -180 y 180")
+    return lat, lng
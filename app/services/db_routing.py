@@ -0,0 +1,219 @@
+"""Enrutamiento de lecturas a réplicas de la base de datos.
+
+Las peticiones GET/HEAD usan una réplica sana y el resto va al primario.
+Un cliente cuya petición escribió en la base de datos sigue leyendo del
+primario durante DB_STICKY_SECONDS para ver sus propios cambios; los POST de
+solo lectura (avistamientos, lotes, recorridos) no cuentan. Si una réplica no
+responde o se atrasa más de DB_REPLICA_MAX_LAG_SECONDS deja de usarse hasta
+que se recupere, y sin réplicas sanas todo va al primario. Una consulta que
+falla en la réplica se repite en el primario sin esperar al siguiente chequeo.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from decouple import config, Csv
+from flask import g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from services import load_shedding
+
+REPLICA_URIS = config("SQLALCHEMY_REPLICA_URIS", default="", cast=Csv())
+STICKY_SECONDS = config("DB_STICKY_SECONDS", default=5, cast=float)
+MAX_LAG_SECONDS = config("DB_REPLICA_MAX_LAG_SECONDS", default=10, cast=float)
+CHECK_SECONDS = config("DB_REPLICA_CHECK_SECONDS", default=5, cast=float)
+
+STICKY_COOKIE = "db_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _replication_lag(connection):
+    """Segundos de atraso de la réplica; None si la replicación está detenida."""
+    if connection.dialect.name != "mysql":
+        connection.execute(text("SELECT 1"))
+        return 0
+    for statement, column in (
+        ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+        ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+    ):
+        try:
+            row = connection.execute(text(statement)).mappings().first()
+        except Exception:
+            continue
+        if row is None:
+            return 0
+        return row.get(column)
+    return 0
+
+
+class Replica:
+    def __init__(self, uri):
+        self.engine = create_engine(uri, pool_pre_ping=True, **load_shedding.engine_options(uri))
+        self.healthy = True
+
+    def check(self):
+        try:
+            with self.engine.connect() as connection:
+                lag = _replication_lag(connection)
+            self.healthy = lag is not None and lag <= MAX_LAG_SECONDS
+        except Exception:
+            self.healthy = False
+
+
+class ReplicaSet:
+    def __init__(self, uris):
+        self.replicas = [Replica(uri) for uri in uris if uri]
+        self._next = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def _run(self):
+        while True:
+            for replica in self.replicas:
+                replica.check()
+            time.sleep(CHECK_SECONDS)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="replica-checker", daemon=True)
+                self._thread.start()
+
+    def choose(self):
+        """Engine de una réplica sana (round robin) o None."""
+        self._ensure_started()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next].engine
+
+    def mark_down(self, engine):
+        """Deja de usar la réplica de engine hasta que el chequeo la recupere."""
+        for replica in self.replicas:
+            if replica.engine is engine:
+                replica.healthy = False
+
+
+replicas = ReplicaSet(REPLICA_URIS)
+
+_sticky_lock = threading.Lock()
+_sticky_until = {}
+
+
+def _client_key():
+    token = request.headers.get("Authorization")
+    if token:
+        return hashlib.sha1(token.encode("utf-8")).hexdigest()
+    return request.remote_addr
+
+
+def _is_sticky():
+    now = time.time()
+    try:
+        if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+            return True
+    except ValueError:
+        pass
+    return _sticky_until.get(_client_key(), 0) > now
+
+
+@contextmanager
+def primary():
+    """Las lecturas dentro del bloque van al primario.
+
+    Las caches e índices en memoria se invalidan con versiones que se
+    incrementan en el primario, así que no deben llenarse desde una réplica
+    que todavía no tiene el cambio.
+    """
+    if not has_app_context():
+        yield
+        return
+    previous = g.get("db_route")
+    g.db_route = "primary"
+    try:
+        yield
+    finally:
+        if previous is None:
+            g.pop("db_route", None)
+        else:
+            g.db_route = previous
+
+
+def primary_reads(f):
+    """Decorador equivalente a ejecutar f dentro de primary()."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        with primary():
+            return f(*args, **kwargs)
+
+    return decorated
+
+
+class RoutingSession(Session):
+    """Sesión que manda las lecturas de peticiones GET a una réplica."""
+
+    def execute(self, *args, **kwargs):
+        try:
+            return super().execute(*args, **kwargs)
+        except OperationalError:
+            replica = g.get("db_replica") if has_request_context() else None
+            if replica is None or g.get("db_route") != "replica":
+                raise
+            # La réplica cayó entre dos chequeos: se descarta y se reintenta
+            replicas.mark_down(replica)
+            self.rollback()
+            g.db_replica = None
+            return super().execute(*args, **kwargs)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and has_request_context()
+            and g.get("db_route") == "replica"
+        ):
+            # Todas las lecturas de la petición van a la misma réplica
+            if "db_replica" not in g:
+                g.db_replica = replicas.choose()
+            if g.db_replica is not None:
+                return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_write(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def init_app(app):
+    @app.before_request
+    def route_database():
+        if replicas and request.method in SAFE_METHODS and not _is_sticky():
+            g.db_route = "replica"
+        else:
+            g.db_route = "primary"
+
+    @app.after_request
+    def remember_write(response):
+        if replicas and g.get("db_wrote") and response.status_code < 400:
+            until = time.time() + STICKY_SECONDS
+            with _sticky_lock:
+                _sticky_until[_client_key()] = until
+                # Limpieza de clientes que ya vencieron
+                if len(_sticky_until) > 10000:
+                    now = time.time()
+                    for key in [key for key, value in _sticky_until.items() if value <= now]:
+                        del _sticky_until[key]
+            response.set_cookie(STICKY_COOKIE, str(until), max_age=int(STICKY_SECONDS) + 1, httponly=True)
+        return response
@@ -0,0 +1,153 @@
+import threading
+
+from services import cache_versions
+from services import db_routing
+from services import lookup_cache
+from models.attraction import Attraction
+from models.detailMaterial import DetailMaterial
+from models.detailTecnique import DetailTecnique
+
+# Faceta -> cache con los nombres de sus valores
+FACETS = {
+    "category": lookup_cache.categories,
+    "author": lookup_cache.authors,
+    "style": lookup_cache.styles,
+    "material": lookup_cache.materials,
+    "tecnique": lookup_cache.tecniques,
+}
+
+
+def _positions(bits):
+    """Recorre las posiciones de los bits encendidos, de menor a mayor."""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class FacetIndex:
+    """Bitmaps por valor de faceta sobre las atracciones no eliminadas.
+
+    Cada atracción ocupa una posición fija y cada bitmap es un int de Python
+    con un bit por posición, así que filtrar es hacer OR dentro de una
+    faceta y AND entre facetas.
+    """
+
+    def __init__(self, attractions, materials, tecniques):
+        self.summaries = []
+        self.bitmaps = {facet: {} for facet in FACETS}
+        self.all_bits = 0
+
+        for position, attraction in enumerate(attractions):
+            bit = 1 << position
+            self.all_bits |= bit
+            self.summaries.append({
+                "id": attraction.id,
+                "name": attraction.name,
+                "lat": attraction.lat,
+                "lng": attraction.lng,
+                "img": attraction.img,
+                "id_category": attraction.id_category,
+            })
+            values = {
+                "category": [attraction.id_category],
+                "author": [attraction.id_author],
+                "style": [attraction.id_style],
+                "material": materials.get(attraction.id, []),
+                "tecnique": tecniques.get(attraction.id, []),
+            }
+            for facet, ids in values.items():
+                bitmaps = self.bitmaps[facet]
+                for id in ids:
+                    if id is not None:
+                        bitmaps[id] = bitmaps.get(id, 0) | bit
+
+    def _selection(self, facet, values):
+        bits = 0
+        bitmaps = self.bitmaps[facet]
+        for value in values:
+            bits |= bitmaps.get(value, 0)
+        return bits
+
+    def filter(self, selected):
+        """Aplica los filtros {faceta: [ids]} y devuelve (bits, conteos).
+
+        El conteo de cada faceta se calcula con los filtros de las demás,
+        para que el cliente vea cuántos resultados tendría al cambiarla.
+        """
+        selections = {
+            facet: self._selection(facet, values) for facet, values in selected.items() if values
+        }
+
+        result = self.all_bits
+        for bits in selections.values():
+            result &= bits
+
+        counts = {}
+        for facet, bitmaps in self.bitmaps.items():
+            base = self.all_bits
+            for other, bits in selections.items():
+                if other != facet:
+                    base &= bits
+            counts[facet] = {
+                value: count
+                for value, count in ((value, (bits & base).bit_count()) for value, bits in bitmaps.items())
+                if count
+            }
+        return result, counts
+
+    def summaries_for(self, bits, offset, limit):
+        page = []
+        for index, position in enumerate(_positions(bits)):
+            if index < offset:
+                continue
+            if len(page) >= limit:
+                break
+            page.append(self.summaries[position])
+        return page
+
+
+def _details(model, column):
+    grouped = {}
+    for detail in model.query.all():
+        grouped.setdefault(detail.id_attraction, []).append(getattr(detail, column))
+    return grouped
+
+
+_lock = threading.Lock()
+_index = None
+_version = None
+
+
+@db_routing.primary_reads
+def get_index():
+    global _index, _version
+    version = cache_versions.current("attraction")
+    if _index is not None and _version == version:
+        return _index
+    with _lock:
+        if _index is None or _version != version:
+            attractions = (
+                Attraction.query.filter(Attraction.is_delete == 0).order_by(Attraction.id).all()
+            )
+            _index = FacetIndex(
+                attractions,
+                _details(DetailMaterial, "id_material"),
+                _details(DetailTecnique, "id_tecnique"),
+            )
+            _version = version
+        return _index
+
+
+def facet_counts(counts):
+    """Convierte los conteos en listas con el nombre de cada valor."""
+    result = {}
+    for facet, values in counts.items():
+        cache = FACETS[facet]
+        items = []
+        for id, count in values.items():
+            row = cache.get(id)
+            items.append({"id": id, "name": row.name if row else None, "count": count})
+        items.sort(key=lambda item: (-item["count"], item["name"] or ""))
+        result[facet] = items
+    return result
@@ -0,0 +1,194 @@
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from collections import namedtuple
+
+from decouple import config
+from flask import has_request_context, url_for
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from services import cache_versions
+from services import db_routing
+from models.attraction_image import AttractionImage
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional, sin él no se generan miniaturas
+    Image = None
+
+# Datos del manifiesto que se guardan en memoria
+ImageRow = namedtuple("ImageRow", ["width", "height", "byte_size", "content_hash", "thumbnail"])
+
+THUMBNAIL_DIR = os.path.abspath(config("THUMBNAIL_DIR", default="thumbnails"))
+THUMBNAIL_MAX_SIZE = config("THUMBNAIL_MAX_SIZE", default=320, cast=int)
+THUMBNAIL_QUALITY = config("THUMBNAIL_QUALITY", default=70, cast=int)
+# Prefijo público de las miniaturas (p. ej. un CDN); vacío usa la ruta relativa
+# de la API para que las respuestas cacheadas no dependan del host.
+THUMBNAIL_BASE_URL = config("THUMBNAIL_BASE_URL", default="")
+DOWNLOAD_TIMEOUT = config("IMAGE_DOWNLOAD_TIMEOUT", default=10, cast=float)
+
+
+def image_urls(img):
+    """Extrae las URLs de la columna libre Attraction.img.
+
+    Acepta una URL suelta, un objeto con "url" o una lista de cualquiera
+    de los dos.
+    """
+    if img is None:
+        return []
+    if not isinstance(img, list):
+        img = [img]
+    urls = []
+    for item in img:
+        url = item.get("url") if isinstance(item, dict) else item
+        if isinstance(url, str) and url:
+            urls.append(url)
+    return urls
+
+
+def _download(url):
+    with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+        return response.read()
+
+
+def _make_thumbnail(content, content_hash):
+    """Genera la miniatura en WebP (o JPEG si no hay soporte) y devuelve
+    (ancho, alto, nombre de archivo)."""
+    with Image.open(io.BytesIO(content)) as image:
+        width, height = image.size
+        image.thumbnail((THUMBNAIL_MAX_SIZE, THUMBNAIL_MAX_SIZE))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        # El nombre depende del contenido, así que puede cachearse para siempre
+        os.makedirs(os.path.join(THUMBNAIL_DIR, content_hash[:2]), exist_ok=True)
+        for image_format, extension in (("WEBP", "webp"), ("JPEG", "jpg")):
+            filename = "{}/{}.{}".format(content_hash[:2], content_hash, extension)
+            path = os.path.join(THUMBNAIL_DIR, filename)
+            try:
+                if not os.path.exists(path):
+                    image.save(path, image_format, quality=THUMBNAIL_QUALITY)
+                return width, height, filename
+            except (KeyError, OSError):
+                continue
+    return width, height, None
+
+
+def build_manifest(attraction, force=False):
+    """Actualiza las filas de AttractionImage de una atracción.
+
+    Las imágenes ya procesadas no se vuelven a descargar salvo con force.
+    Devuelve el número de imágenes procesadas.
+    """
+    urls = image_urls(attraction.img)
+    existing = {
+        row.url: row
+        for row in AttractionImage.query.filter(AttractionImage.id_attraction == attraction.id).all()
+    }
+
+    processed = 0
+    for url in urls:
+        row = existing.pop(url, None)
+        if row is not None and row.content_hash and not force:
+            continue
+        content = _download(url)
+        content_hash = hashlib.sha256(content).hexdigest()
+        width = height = thumbnail = None
+        if Image is not None:
+            width, height, thumbnail = _make_thumbnail(content, content_hash)
+
+        if row is None:
+            row = AttractionImage(id_attraction=attraction.id, url=url)
+            db.session.add(row)
+        row.width = width
+        row.height = height
+        row.byte_size = len(content)
+        row.content_hash = content_hash
+        row.thumbnail = thumbnail
+        processed += 1
+
+    # Las URLs que ya no están en la atracción salen del manifiesto
+    for row in existing.values():
+        db.session.delete(row)
+
+    db.session.commit()
+    if processed or existing:
+        cache_versions.bump("attraction_image")
+    return processed
+
+
+_lock = threading.Lock()
+_manifest = None
+_manifest_version = None
+
+
+@db_routing.primary_reads
+def _manifest_by_url():
+    global _manifest, _manifest_version
+    version = cache_versions.current("attraction_image")
+    if _manifest is not None and _manifest_version == version:
+        return _manifest
+    with _lock:
+        if _manifest is None or _manifest_version != version:
+            try:
+                rows = AttractionImage.query.all()
+            except SQLAlchemyError:
+                # Sin la tabla attraction_image se responde con las URLs originales
+                db.session.rollback()
+                rows = []
+            _manifest = {
+                row.url: ImageRow(row.width, row.height, row.byte_size, row.content_hash, row.thumbnail)
+                for row in rows
+            }
+            _manifest_version = version
+        return _manifest
+
+
+def thumbnail_href(filename):
+    """URL pública de un archivo de miniatura."""
+    if THUMBNAIL_BASE_URL:
+        return THUMBNAIL_BASE_URL.rstrip("/") + "/" + filename
+    if has_request_context():
+        return url_for("attraction.get_thumbnail", filename=filename)
+    return "/attraction/thumbnails/" + filename
+
+
+def thumbnail_url(url):
+    """URL de la miniatura de una imagen o la original si no tiene."""
+    row = _manifest_by_url().get(url)
+    if row is None or not row.thumbnail:
+        return url
+    return thumbnail_href(row.thumbnail)
+
+
+def list_img(img):
+    """Devuelve img con la misma forma pero apuntando a las miniaturas."""
+    if isinstance(img, list):
+        return [list_img(item) for item in img]
+    if isinstance(img, dict) and isinstance(img.get("url"), str):
+        item = dict(img)
+        item["url"] = thumbnail_url(img["url"])
+        return item
+    if isinstance(img, str):
+        return thumbnail_url(img)
+    return img
+
+
+def manifest(img):
+    """Manifiesto completo de las imágenes de una atracción."""
+    rows = _manifest_by_url()
+    entries = []
+    for url in image_urls(img):
+        row = rows.get(url)
+        entries.append({
+            "url": url,
+            "width": row.width if row else None,
+            "height": row.height if row else None,
+            "byte_size": row.byte_size if row else None,
+            "content_hash": row.content_hash if row else None,
+            "thumbnail": thumbnail_url(url),
+        })
+    return entries
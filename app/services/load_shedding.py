@@ -0,0 +1,95 @@
+"""Descarte de carga cuando el worker está saturado.
+
+Si hay demasiadas peticiones en curso en el worker, o si obtener una
+conexión del pool de la base de datos está tardando demasiado, las
+peticiones nuevas reciben 503 con Retry-After en lugar de encolarse.
+"""
+import threading
+import time
+
+from decouple import config
+from flask import g, jsonify, request
+from sqlalchemy.pool import QueuePool
+
+ENABLED = config("SHED_ENABLED", default=True, cast=bool)
+MAX_IN_FLIGHT = config("SHED_MAX_IN_FLIGHT", default=64, cast=int)
+# Espera promedio reciente por una conexión del pool a partir de la cual se descarta
+MAX_POOL_WAIT_MS = config("SHED_MAX_POOL_WAIT_MS", default=500, cast=float)
+# Sin esperas registradas en este lapso se asume que el pool está libre
+WINDOW_SECONDS = config("SHED_WINDOW_SECONDS", default=5, cast=float)
+RETRY_AFTER_SECONDS = config("SHED_RETRY_AFTER_SECONDS", default=1, cast=int)
+
+EXEMPT_BLUEPRINTS = ("health",)
+# Peso de cada medición nueva en el promedio móvil
+_ALPHA = 0.2
+
+_lock = threading.Lock()
+_in_flight = 0
+_wait_avg = 0.0
+_last_wait = 0.0
+
+
+def _record_wait(seconds):
+    global _wait_avg, _last_wait
+    with _lock:
+        _wait_avg += _ALPHA * (seconds - _wait_avg)
+        _last_wait = time.monotonic()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto tarda cada checkout de una conexión."""
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        finally:
+            _record_wait(time.monotonic() - started)
+
+
+def engine_options(uri):
+    """Opciones de create_engine para medir la espera del pool de uri."""
+    # SQLite en memoria no usa QueuePool
+    if uri.startswith("sqlite") and (":memory:" in uri or uri.rstrip("/") == "sqlite:"):
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+def pool_wait_ms():
+    with _lock:
+        if time.monotonic() - _last_wait > WINDOW_SECONDS:
+            return 0.0
+        return _wait_avg * 1000
+
+
+def in_flight():
+    return _in_flight
+
+
+def init_app(app):
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def shed_load():
+        global _in_flight
+        if request.blueprint in EXEMPT_BLUEPRINTS or request.environ.get("catalog.warmup"):
+            return None
+        with _lock:
+            overloaded = _in_flight >= MAX_IN_FLIGHT
+            if not overloaded:
+                _in_flight += 1
+                g.load_counted = True
+        if overloaded or pool_wait_ms() > MAX_POOL_WAIT_MS:
+            response = jsonify({"error": "Servidor saturado, intenta de nuevo más tarde."})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+            return response
+        return None
+
+    @app.teardown_request
+    def release_slot(exc):
+        global _in_flight
+        if g.pop("load_counted", False):
+            with _lock:
+                _in_flight -= 1
@@ -0,0 +1,87 @@
+import threading
+from collections import namedtuple
+
+from services import cache_versions
+from services import db_routing
+from models.author import Author
+from models.style import Style
+from models.category import Category
+from models.material import Material
+from models.tecnique import Tecnique
+
+# Registro ligero de una tabla de referencia
+LookupRow = namedtuple("LookupRow", ["id", "name", "is_delete"])
+
+
+class LookupCache:
+    """Cache en memoria de una tabla pequeña de referencia.
+
+    La tabla se carga completa la primera vez y se vuelve a cargar cuando
+    cambia su versión en cache_versions. Un ID que no está en la copia se
+    busca en la base de datos, porque otro worker pudo crearlo antes de que
+    llegue la versión nueva.
+    """
+
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+        self._rows = None
+        self._version = None
+        # IDs que tampoco estaban en la base de datos, por cada carga de la tabla
+        self._missing = (None, set())
+        self._lock = threading.Lock()
+
+    @db_routing.primary_reads
+    def _load(self):
+        version = cache_versions.current(self.name)
+        if self._rows is not None and self._version == version:
+            return self._rows
+        with self._lock:
+            if self._rows is None or self._version != version:
+                rows = {}
+                for item in self.model.query.all():
+                    rows[item.id] = LookupRow(item.id, item.name, bool(item.is_delete))
+                self._rows = rows
+                self._version = version
+            return self._rows
+
+    def get(self, id):
+        """Devuelve el LookupRow con ese ID o None."""
+        if id is None:
+            return None
+        rows = self._load()
+        row = rows.get(id)
+        if row is not None:
+            return row
+        loaded, missing = self._missing
+        if loaded is rows and id in missing:
+            return None
+        row = self._fetch(id)
+        if row is None:
+            if loaded is not rows:
+                missing = set()
+                self._missing = (rows, missing)
+            missing.add(id)
+        return row
+
+    @db_routing.primary_reads
+    def _fetch(self, id):
+        item = self.model.query.get(id)
+        if item is None:
+            return None
+        return LookupRow(item.id, item.name, bool(item.is_delete))
+
+    def rows(self):
+        """Diccionario ID -> LookupRow; es el mismo objeto hasta la próxima recarga."""
+        return self._load()
+
+    def all(self):
+        """Devuelve todos los registros no eliminados."""
+        return [row for row in self._load().values() if not row.is_delete]
+
+
+authors = LookupCache("author", Author)
+styles = LookupCache("style", Style)
+categories = LookupCache("category", Category)
+materials = LookupCache("material", Material)
+tecniques = LookupCache("tecnique", Tecnique)
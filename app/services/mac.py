@@ -0,0 +1,43 @@
+import re
+
+# Tabla para str.translate que elimina los separadores habituales; los
+# espacios en blanco de cualquier tipo se quitan aparte con str.split()
+_SEPARATORS = str.maketrans("", "", ":-.")
+_HEX12 = re.compile(r"[0-9a-fA-F]{12}")
+
+
+def parse_mac(value):
+    """Convierte una MAC en su entero canónico de 48 bits.
+
+    Acepta "AA:BB:CC:DD:EE:FF", "aa-bb-cc-dd-ee-ff", "aabb.ccdd.eeff" y
+    "aabbccddeeff". Devuelve None si el valor no es una MAC válida.
+    """
+    if not isinstance(value, str):
+        return None
+    digits = "".join(value.translate(_SEPARATORS).split())
+    if not _HEX12.fullmatch(digits):
+        return None
+    return int(digits, 16)
+
+
+def parse_macs(values):
+    """Versión por lotes de parse_mac, con None en las posiciones inválidas.
+
+    No está vectorizada: recorre los valores uno por uno, solo que sin volver
+    a buscar la tabla y la expresión regular en cada vuelta.
+    """
+    match = _HEX12.fullmatch
+    table = _SEPARATORS
+    result = []
+    for value in values:
+        digits = "".join(value.translate(table).split()) if isinstance(value, str) else ""
+        result.append(int(digits, 16) if match(digits) else None)
+    return result
+
+
+def format_mac(address):
+    """Convierte el entero canónico en "AA:BB:CC:DD:EE:FF"."""
+    if address is None:
+        return None
+    digits = "%012X" % address
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
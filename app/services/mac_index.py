@@ -0,0 +1,70 @@
+import threading
+from collections import namedtuple
+
+from services import cache_versions
+from services import db_routing
+from services.mac import parse_macs
+from models.attraction import Attraction
+from models.mac_address import MacAddress
+
+# Datos mínimos de la atracción asociada a una MAC
+BeaconAttraction = namedtuple(
+    "BeaconAttraction", ["id", "name", "lat", "lng", "description", "img", "size", "id_category"]
+)
+
+_lock = threading.Lock()
+_index = None
+_version = None
+
+
+@db_routing.primary_reads
+def _build():
+    """Índice MAC (entero canónico) -> atracción no eliminada."""
+    attractions = {}
+    for attraction in Attraction.query.filter(
+        Attraction.is_delete == 0, Attraction.id_mac_address.isnot(None)
+    ).all():
+        attractions[attraction.id_mac_address] = BeaconAttraction(
+            attraction.id,
+            attraction.name,
+            attraction.lat,
+            attraction.lng,
+            attraction.description,
+            attraction.img,
+            attraction.size,
+            attraction.id_category,
+        )
+
+    index = {}
+    for mac_address in MacAddress.query.filter(MacAddress.is_delete == 0).all():
+        index[mac_address.address] = attractions.get(mac_address.id)
+    return index
+
+
+def get_index():
+    global _index, _version
+    version = (cache_versions.current("mac_address"), cache_versions.current("attraction"))
+    if _index is not None and _version == version:
+        return _index
+    with _lock:
+        if _index is None or _version != version:
+            _index = _build()
+            _version = version
+        return _index
+
+
+def resolve(addresses):
+    """Resuelve un lote de MACs escaneadas.
+
+    Devuelve (resultados, inválidas) donde resultados es una lista de
+    (mac original, BeaconAttraction o None) en el orden recibido.
+    """
+    index = get_index()
+    results = []
+    invalid = []
+    for value, address in zip(addresses, parse_macs(addresses)):
+        if address is None:
+            invalid.append(value)
+        else:
+            results.append((value, index.get(address)))
+    return results, invalid
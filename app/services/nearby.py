@@ -0,0 +1,160 @@
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from decouple import config
+
+from services import cache_versions
+from services import catalog_snapshot
+from services import coordinates
+from services import db_routing
+from models.attraction import Attraction
+
+# Datos de una atracción necesarios para la búsqueda por cercanía
+NearbyPoint = namedtuple(
+    "NearbyPoint", ["id", "name", "lat", "lng", "description", "img", "size", "id_category"]
+)
+
+# Precisión del geohash con el que se agrupan las consultas (6 ~ 1.2 x 0.6 km)
+CELL_PRECISION = config("NEARBY_CELL_PRECISION", default=6, cast=int)
+CELL_TTL_SECONDS = config("NEARBY_CELL_TTL_SECONDS", default=60, cast=float)
+CELL_CACHE_SIZE = config("NEARBY_CELL_CACHE_SIZE", default=10000, cast=int)
+
+EARTH_RADIUS_KM = 6371.0088
+# Holgura para la diferencia entre haversine y la distancia geodésica (< 0.5%)
+_HAVERSINE_MARGIN = 1.01
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+_lock = threading.Lock()
+_points = None
+_version = None
+
+_cells_lock = threading.Lock()
+_cells = OrderedDict()
+
+
+def _current_version():
+    snapshot = catalog_snapshot.get_snapshot()
+    return (cache_versions.current("attraction"), snapshot.mtime if snapshot is not None else None)
+
+
+@db_routing.primary_reads
+def _build():
+    # En réplicas de solo lectura se carga desde el snapshot mapeado, que no
+    # tiene is_geolocated y se filtra con la misma validación
+    snapshot = catalog_snapshot.get_snapshot()
+    if snapshot is not None:
+        attractions = [
+            attraction for attraction in snapshot.attractions()
+            if coordinates.is_valid(attraction.lat, attraction.lng)
+        ]
+    else:
+        attractions = Attraction.query.filter(
+            Attraction.is_delete == 0, Attraction.is_geolocated == 1
+        ).all()
+    return [
+        NearbyPoint(
+            attraction.id,
+            attraction.name,
+            attraction.lat,
+            attraction.lng,
+            attraction.description,
+            attraction.img,
+            attraction.size,
+            attraction.id_category,
+        )
+        for attraction in attractions
+    ]
+
+
+def get_points():
+    """Lista de NearbyPoint de las atracciones no eliminadas y geolocalizadas."""
+    global _points, _version
+    version = _current_version()
+    if _points is not None and _version == version:
+        return _points
+    with _lock:
+        if _points is None or _version != version:
+            _points = _build()
+            _version = version
+        return _points
+
+
+def geohash_cell(lat, lng, precision=CELL_PRECISION):
+    """Geohash de la celda y sus límites (min_lat, max_lat, min_lng, max_lng)."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Los bits alternan entre longitud y latitud
+        if even:
+            coord, bounds = lng, lng_range
+        else:
+            coord, bounds = lat, lat_range
+        mid = (bounds[0] + bounds[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            bounds[0] = mid
+        else:
+            value <<= 1
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars), (lat_range[0], lat_range[1], lng_range[0], lng_range[1])
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _cell_candidates(points, bounds, radius_km):
+    min_lat, max_lat, min_lng, max_lng = bounds
+    center_lat = (min_lat + max_lat) / 2
+    center_lng = (min_lng + max_lng) / 2
+    # Cualquier punto de la celda está a lo más a esta distancia del centro
+    half_diagonal = haversine_km(center_lat, center_lng, max_lat, max_lng)
+    limit = (radius_km + half_diagonal) * _HAVERSINE_MARGIN
+    candidates = []
+    for point in points:
+        if haversine_km(center_lat, center_lng, point.lat, point.lng) <= limit:
+            candidates.append(point)
+    return candidates
+
+
+def candidates(lat, lng, radius_km):
+    """Puntos que pueden estar a radius_km o menos de (lat, lng).
+
+    Las coordenadas se agrupan en una celda geohash y la lista de candidatos
+    de cada celda se guarda CELL_TTL_SECONDS, así que a quien llama solo le
+    queda calcular la distancia exacta y ordenar unos pocos puntos.
+    """
+    points = get_points()
+    cell, bounds = geohash_cell(lat, lng)
+    key = (cell, radius_km)
+    now = time.monotonic()
+    with _cells_lock:
+        entry = _cells.get(key)
+        if entry is not None and entry[0] is points and entry[1] > now:
+            _cells.move_to_end(key)
+            return entry[2]
+
+    result = _cell_candidates(points, bounds, radius_km)
+    with _cells_lock:
+        _cells[key] = (points, now + CELL_TTL_SECONDS, result)
+        _cells.move_to_end(key)
+        while len(_cells) > CELL_CACHE_SIZE:
+            _cells.popitem(last=False)
+    return result
@@ -0,0 +1,198 @@
+"""Popularidad de las atracciones con decaimiento exponencial.
+
+Cada visita o avistamiento suma un peso escalado por 2 ** ((t - epoch) /
+HALF_LIFE), donde epoch avanza una vida media a la vez. Así el factor nunca
+pasa de 2, todos los puntajes de una misma época se comparan sin
+recalcularlos y los workers solo tienen que sumar sus deltas en la base de
+datos. Cada fila guarda la época a la que está escalada y se reescala al
+pasar a la siguiente.
+"""
+import datetime
+import math
+import threading
+import time
+
+from decouple import config
+
+from app import app, db
+from models.attraction_popularity import AttractionPopularity
+
+HALF_LIFE_SECONDS = config("POPULARITY_HALF_LIFE_HOURS", default=168, cast=float) * 3600
+FLUSH_SECONDS = config("POPULARITY_FLUSH_SECONDS", default=60, cast=float)
+VIEW_WEIGHT = config("POPULARITY_VIEW_WEIGHT", default=1.0, cast=float)
+SIGHTING_WEIGHT = config("POPULARITY_SIGHTING_WEIGHT", default=0.2, cast=float)
+# Peso de la popularidad frente a la distancia al ordenar atracciones cercanas
+RANK_WEIGHT = config("POPULARITY_RANK_WEIGHT", default=0.3, cast=float)
+# Reintentos al reescalar una fila que otro worker está actualizando
+_MAX_REBASE_ATTEMPTS = 5
+
+_lock = threading.Lock()
+# _scores y _pending están escalados a _epoch
+_epoch = None
+_scores = {}
+_pending = {}
+_max_score = 0.0
+_start_lock = threading.Lock()
+_thread = None
+
+
+def current_epoch(now=None):
+    """Inicio de la vida media actual; es el mismo en todos los workers."""
+    now = time.time() if now is None else now
+    return math.floor(now / HALF_LIFE_SECONDS) * HALF_LIFE_SECONDS
+
+
+def rescale(score, from_epoch, to_epoch):
+    """Lleva un puntaje escalado a from_epoch a la escala de to_epoch."""
+    # Con to_epoch posterior el exponente es negativo y a lo más da 0.0
+    return score * 2 ** ((from_epoch - to_epoch) / HALF_LIFE_SECONDS)
+
+
+def _scaled(weight, epoch, now=None):
+    now = time.time() if now is None else now
+    return weight * 2 ** ((now - epoch) / HALF_LIFE_SECONDS)
+
+
+def _advance_epoch(epoch):
+    """Reescala lo que está en memoria a una época nueva; requiere _lock."""
+    global _epoch, _scores, _pending, _max_score
+    if _epoch == epoch:
+        return
+    if _epoch is not None:
+        _scores = {key: rescale(value, _epoch, epoch) for key, value in _scores.items()}
+        _pending = {key: rescale(value, _epoch, epoch) for key, value in _pending.items()}
+        _max_score = max(_scores.values(), default=0.0)
+    _epoch = epoch
+
+
+def record(id_attraction, weight):
+    """Suma un evento a la popularidad de una atracción.
+
+    Nunca lanza excepciones: la popularidad no debe hacer fallar la
+    petición que la registra.
+    """
+    if id_attraction is None:
+        return
+    global _max_score
+    try:
+        _ensure_started()
+        epoch = current_epoch()
+        value = _scaled(weight, epoch)
+        with _lock:
+            _advance_epoch(epoch)
+            _pending[id_attraction] = _pending.get(id_attraction, 0.0) + value
+            score = _scores.get(id_attraction, 0.0) + value
+            _scores[id_attraction] = score
+            if score > _max_score:
+                _max_score = score
+    except Exception as e:
+        app.logger.warning("No se pudo registrar la popularidad de %s: %s", id_attraction, e)
+
+
+def record_view(id_attraction):
+    record(id_attraction, VIEW_WEIGHT)
+
+
+def record_sighting(id_attraction):
+    record(id_attraction, SIGHTING_WEIGHT)
+
+
+def normalized(id_attraction):
+    """Popularidad relativa entre 0 y 1 respecto a la más popular."""
+    _ensure_started()
+    if _max_score <= 0:
+        return 0.0
+    return _scores.get(id_attraction, 0.0) / _max_score
+
+
+def rank(distance, radius, popularity):
+    """Puntaje para ordenar: menor es mejor."""
+    return (1 - RANK_WEIGHT) * (distance / radius) - RANK_WEIGHT * popularity
+
+
+def _add_delta(id_attraction, delta, epoch, now):
+    """Suma delta (escalado a epoch) a la fila, reescalándola si es de otra época."""
+    for _ in range(_MAX_REBASE_ATTEMPTS):
+        updated = AttractionPopularity.query.filter(
+            AttractionPopularity.id_attraction == id_attraction,
+            AttractionPopularity.epoch == epoch,
+        ).update({
+            AttractionPopularity.score: AttractionPopularity.score + delta,
+            AttractionPopularity.update_at: now,
+        })
+        if updated:
+            return
+        row = AttractionPopularity.query.get(id_attraction)
+        if row is None:
+            db.session.add(AttractionPopularity(
+                id_attraction=id_attraction, score=delta, epoch=epoch, update_at=now
+            ))
+            db.session.flush()
+            return
+        db.session.expire(row)
+        # Solo se reescala si nadie cambió la fila desde que se leyó
+        updated = AttractionPopularity.query.filter(
+            AttractionPopularity.id_attraction == id_attraction,
+            AttractionPopularity.epoch == row.epoch,
+            AttractionPopularity.score == row.score,
+        ).update({
+            AttractionPopularity.score: rescale(row.score, row.epoch, epoch) + delta,
+            AttractionPopularity.epoch: epoch,
+            AttractionPopularity.update_at: now,
+        })
+        if updated:
+            return
+    raise RuntimeError("No se pudo reescalar la popularidad de {}".format(id_attraction))
+
+
+def flush():
+    """Suma los deltas pendientes en la base de datos y recarga los totales."""
+    global _scores, _max_score
+    epoch = current_epoch()
+    with _lock:
+        _advance_epoch(epoch)
+        pending = dict(_pending)
+        _pending.clear()
+
+    now = datetime.datetime.utcnow()
+    try:
+        for id_attraction, delta in pending.items():
+            _add_delta(id_attraction, delta, epoch, now)
+        db.session.commit()
+        rows = AttractionPopularity.query.all()
+    except Exception:
+        db.session.rollback()
+        # Se devuelven los deltas para intentarlo en el siguiente ciclo
+        with _lock:
+            for id_attraction, delta in pending.items():
+                delta = rescale(delta, epoch, _epoch)
+                _pending[id_attraction] = _pending.get(id_attraction, 0.0) + delta
+        raise
+
+    with _lock:
+        scores = {row.id_attraction: rescale(row.score, row.epoch, _epoch) for row in rows}
+        # Lo registrado durante el flush todavía no está en la base de datos
+        for id_attraction, delta in _pending.items():
+            scores[id_attraction] = scores.get(id_attraction, 0.0) + delta
+        _scores = scores
+        _max_score = max(scores.values(), default=0.0)
+
+
+def _run():
+    while True:
+        with app.app_context():
+            try:
+                flush()
+            except Exception as e:
+                app.logger.warning("No se pudo guardar la popularidad: %s", e)
+        time.sleep(FLUSH_SECONDS)
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None:
+        return
+    with _start_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="popularity-flusher", daemon=True)
+            _thread.start()
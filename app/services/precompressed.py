@@ -0,0 +1,76 @@
+import gzip
+import hashlib
+
+from decouple import config
+from flask import Response, current_app, request
+
+from services import cache_versions
+from services import catalog_snapshot
+from services import db_routing
+from services.single_flight import SingleFlight
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional, sin él solo se ofrece gzip
+    brotli = None
+
+# Tamaño mínimo en bytes para que valga la pena comprimir la respuesta
+MIN_SIZE = config("PRECOMPRESS_MIN_SIZE", default=1024, cast=int)
+
+# Tablas de las que dependen las respuestas del catálogo público
+CATALOG_TABLES = ("attraction", "category", "attraction_image")
+
+_flights = SingleFlight("precompressed")
+
+
+def catalog_version(*tables):
+    """Versión del catálogo: cambia con cualquier escritura o snapshot nuevo.
+
+    tables agrega otras tablas de las que dependa la respuesta. Es un par
+    (versión de este proceso, versión compartida entre workers); la segunda
+    es None si no se puede comparar con la de otros workers.
+    """
+    snapshot = catalog_snapshot.get_snapshot()
+    mtime = snapshot.mtime if snapshot is not None else None
+    names = CATALOG_TABLES + tables
+    local = tuple(cache_versions.current(name) for name in names) + (mtime,)
+    shared = tuple(cache_versions.shared(name) for name in names) + (mtime,)
+    return local, (None if None in shared[:-1] else shared)
+
+
+def _encode(payload):
+    body = (current_app.json.dumps(payload) + "\n").encode("utf-8")
+    bodies = {"identity": body}
+    if len(body) >= MIN_SIZE:
+        bodies["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body, quality=11)
+    return bodies
+
+
+def json_response(key, version, build):
+    """Responde con el JSON de build() codificado y comprimido una sola vez.
+
+    El resultado se guarda por key hasta que cambie version y se envía en la
+    codificación que prefiera el cliente según Accept-Encoding. Las
+    peticiones simultáneas comparten un solo cálculo y, mientras se
+    reconstruye, se sigue sirviendo la versión anterior.
+    """
+    def encode():
+        # Se guarda bajo la versión del primario, así que se lee de ahí
+        with db_routing.primary():
+            bodies = _encode(build())
+        return bodies, hashlib.sha1(bodies["identity"]).hexdigest()
+
+    local, shared = version
+    bodies, etag = _flights.get(key, local, encode, shared)
+
+    available = [name for name in ("br", "gzip") if name in bodies]
+    encoding = request.accept_encodings.best_match(available + ["identity"], default="identity")
+
+    response = Response(bodies[encoding], status=200, mimetype="application/json")
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag + "-" + encoding)
+    return response.make_conditional(request)
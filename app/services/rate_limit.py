@@ -0,0 +1,180 @@
+"""Limitación de peticiones con token buckets por cliente.
+
+Cada cliente tiene un bucket por IP y, si manda un JWT válido, otro por el
+sujeto del token. En los endpoints con límite propio un JWT válido reemplaza
+al bucket por IP, para que los usuarios detrás de un mismo NAT (una red de
+campus, por ejemplo) no compartan un solo bucket. Los buckets viven en la memoria del worker; con
+RATE_LIMIT_REDIS_URL (y el paquete redis instalado) se comparten entre
+workers. MemoryBackend también sirve como sustituto local del almacén
+compartido en pruebas.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+from decouple import config
+from flask import current_app, jsonify, request
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+# Límite general: tokens por segundo y tamaño máximo de la ráfaga
+RATE = config("RATE_LIMIT_RATE", default=10, cast=float)
+BURST = config("RATE_LIMIT_BURST", default=40, cast=float)
+REDIS_URL = config("RATE_LIMIT_REDIS_URL", default="")
+# Solo detrás de un proxy confiable se usa X-Forwarded-For
+TRUST_PROXY = config("RATE_LIMIT_TRUST_PROXY", default=False, cast=bool)
+MAX_KEYS = config("RATE_LIMIT_MAX_KEYS", default=100000, cast=int)
+SECRET_KEY = config("SECRET_KEY")
+
+# Endpoints públicos costosos con su propio bucket: (tokens por segundo, ráfaga)
+ENDPOINT_LIMITS = {
+    "attraction.get_nearby_attractions": (
+        config("RATE_LIMIT_NEARBY_RATE", default=1, cast=float),
+        config("RATE_LIMIT_NEARBY_BURST", default=5, cast=float),
+    ),
+    # La respuesta sale precomprimida de la caché; el límite solo cuida el ancho de banda
+    "attraction.getallattracctions": (
+        config("RATE_LIMIT_ALL_ATTRACTIONS_RATE", default=2, cast=float),
+        config("RATE_LIMIT_ALL_ATTRACTIONS_BURST", default=30, cast=float),
+    ),
+}
+EXEMPT_BLUEPRINTS = ("health",)
+
+
+class MemoryBackend:
+    """Buckets en la memoria del worker, del menos al más recientemente usado."""
+
+    def __init__(self, max_keys=MAX_KEYS):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, rate, burst):
+        """Toma un token; devuelve 0 o los segundos a esperar por el siguiente."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            # Se guarda cuándo se llenaría para poder descartarlo después
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            self._buckets.move_to_end(key)
+            self._evict(now)
+        return wait
+
+    def _evict(self, now):
+        # Solo se revisan los más antiguos: un bucket que ya se habría llenado
+        # equivale a no tenerlo, y sobre el máximo se descarta el menos usado
+        while self._buckets:
+            _, _, full_at = next(iter(self._buckets.values()))
+            if full_at > now and len(self._buckets) <= self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+
+# Token bucket atómico en Redis, con el reloj del propio servidor
+_REDIS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(data[1]) or burst
+local updated = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Buckets compartidos entre workers en Redis."""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(_REDIS_SCRIPT)
+        self.fallback = MemoryBackend()
+
+    def take(self, key, rate, burst):
+        try:
+            return float(self.script(keys=["rate_limit:" + key], args=[rate, burst]))
+        except redis.RedisError as e:
+            # Sin Redis se sigue limitando por worker
+            current_app.logger.warning("Rate limit sin Redis: %s", e)
+            return self.fallback.take(key, rate, burst)
+
+
+if REDIS_URL and redis is not None:
+    backend = RedisBackend(REDIS_URL)
+else:
+    backend = MemoryBackend()
+
+
+def _client_ip():
+    if TRUST_PROXY and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+
+def _subject():
+    token = request.headers.get("Authorization", "")
+    if not token.startswith("Bearer "):
+        return None
+    try:
+        data = jwt.decode(token[len("Bearer "):], SECRET_KEY, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return data.get("sub") or data.get("email")
+
+
+def check():
+    """Segundos que el cliente debe esperar; 0 si la petición puede pasar."""
+    group = request.endpoint if request.endpoint in ENDPOINT_LIMITS else "default"
+    rate, burst = ENDPOINT_LIMITS.get(group, (RATE, BURST))
+    subject = _subject()
+    wait = 0.0
+    if subject is None or group == "default":
+        wait = backend.take("%s:ip:%s" % (group, _client_ip()), rate, burst)
+    if subject is not None:
+        wait = max(wait, backend.take("%s:sub:%s" % (group, subject), rate, burst))
+    return wait
+
+
+def init_app(app):
+    if not ENABLED:
+        return
+    if REDIS_URL and redis is None:
+        app.logger.warning("RATE_LIMIT_REDIS_URL requiere el paquete redis; se usa memoria local")
+
+    @app.before_request
+    def limit_requests():
+        if (
+            request.method == "OPTIONS"
+            or request.blueprint in EXEMPT_BLUEPRINTS
+            or request.environ.get("catalog.warmup")
+        ):
+            return None
+        wait = check()
+        if wait > 0:
+            response = jsonify({"error": "Demasiadas peticiones, intenta de nuevo más tarde."})
+            response.status_code = 429
+            response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+            return response
+        return None
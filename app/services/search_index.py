@@ -0,0 +1,217 @@
+import bisect
+import re
+import threading
+import unicodedata
+
+from decouple import config
+
+from services import cache_versions
+from services import db_routing
+from services import lookup_cache
+from models.attraction import Attraction
+from models.detailMaterial import DetailMaterial
+from models.detailTecnique import DetailTecnique
+
+# Peso de cada campo en el puntaje de un resultado
+FIELD_WEIGHTS = {"name": 3, "lookup": 2, "description": 1}
+# Máximo de palabras del vocabulario que se expanden para un prefijo
+MAX_PREFIX_EXPANSION = config("SEARCH_MAX_PREFIX_EXPANSION", default=200, cast=int)
+
+LOOKUP_TABLES = ("author", "style", "material", "tecnique")
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Minúsculas y sin acentos: "Técnica" -> "tecnica"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _WORD.findall(normalize(text))
+
+
+class SearchIndex:
+    """Índice invertido palabra -> {id de atracción: peso}.
+
+    El vocabulario se mantiene ordenado para resolver prefijos con bisect.
+    Un índice publicado no se modifica: los cambios se hacen sobre copy() y
+    después se reemplaza la referencia, así las búsquedas no necesitan lock.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.documents = {}
+        self.vocabulary = []
+        self.summaries = {}
+
+    def copy(self):
+        index = SearchIndex()
+        index.postings = {token: dict(posting) for token, posting in self.postings.items()}
+        index.documents = dict(self.documents)
+        index.vocabulary = list(self.vocabulary)
+        index.summaries = dict(self.summaries)
+        return index
+
+    def add(self, attraction, lookup_names):
+        weights = {}
+        for field, text in (("name", attraction.name), ("description", attraction.description)):
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+        for name in lookup_names:
+            for token in tokenize(name):
+                weights[token] = weights.get(token, 0) + FIELD_WEIGHTS["lookup"]
+
+        for token, weight in weights.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = {}
+                bisect.insort(self.vocabulary, token)
+            posting[attraction.id] = weight
+        self.documents[attraction.id] = list(weights)
+        self.summaries[attraction.id] = {
+            "id": attraction.id,
+            "name": attraction.name,
+            "lat": attraction.lat,
+            "lng": attraction.lng,
+            "img": attraction.img,
+            "id_category": attraction.id_category,
+        }
+
+    def remove(self, id_attraction):
+        for token in self.documents.pop(id_attraction, []):
+            posting = self.postings[token]
+            posting.pop(id_attraction, None)
+            if not posting:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+        self.summaries.pop(id_attraction, None)
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        words = []
+        for word in self.vocabulary[start:start + MAX_PREFIX_EXPANSION]:
+            if not word.startswith(prefix):
+                break
+            words.append(word)
+        return words
+
+    def search(self, query, limit):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        scores = None
+        for position, token in enumerate(tokens):
+            # La última palabra se trata como prefijo (búsqueda mientras se escribe)
+            if position == len(tokens) - 1:
+                words = self._expand(token)
+            else:
+                words = [token] if token in self.postings else []
+
+            matches = {}
+            for word in words:
+                for id_attraction, weight in self.postings[word].items():
+                    if weight > matches.get(id_attraction, 0):
+                        matches[id_attraction] = weight
+
+            if scores is None:
+                scores = matches
+            else:
+                scores = {id: score + matches[id] for id, score in scores.items() if id in matches}
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.summaries[item[0]]["name"] or ""))
+        return [dict(self.summaries[id], score=score) for id, score in ranked[:max(limit, 0)]]
+
+
+def _lookup_names(attraction, materials, tecniques):
+    names = []
+    for cache, id in ((lookup_cache.authors, attraction.id_author), (lookup_cache.styles, attraction.id_style)):
+        row = cache.get(id)
+        if row:
+            names.append(row.name)
+    for id in materials:
+        row = lookup_cache.materials.get(id)
+        if row:
+            names.append(row.name)
+    for id in tecniques:
+        row = lookup_cache.tecniques.get(id)
+        if row:
+            names.append(row.name)
+    return names
+
+
+def _details(model, column, id_attraction=None):
+    query = model.query
+    if id_attraction is not None:
+        query = query.filter(model.id_attraction == id_attraction)
+    grouped = {}
+    for detail in query.all():
+        grouped.setdefault(detail.id_attraction, []).append(getattr(detail, column))
+    return grouped
+
+
+_lock = threading.Lock()
+_index = None
+_version = None
+
+
+def _current_version():
+    return tuple(cache_versions.current(name) for name in ("attraction",) + LOOKUP_TABLES)
+
+
+@db_routing.primary_reads
+def _build():
+    index = SearchIndex()
+    materials = _details(DetailMaterial, "id_material")
+    tecniques = _details(DetailTecnique, "id_tecnique")
+    for attraction in Attraction.query.filter(Attraction.is_delete == 0).all():
+        index.add(attraction, _lookup_names(
+            attraction, materials.get(attraction.id, []), tecniques.get(attraction.id, [])
+        ))
+    return index
+
+
+def get_index():
+    global _index, _version
+    version = _current_version()
+    if _index is not None and _version == version:
+        return _index
+    with _lock:
+        if _index is None or _version != version:
+            _index = _build()
+            _version = version
+        return _index
+
+
+@db_routing.primary_reads
+def update(id_attraction):
+    """Reindexa una sola atracción después de crearla, editarla o borrarla."""
+    global _index, _version
+    with _lock:
+        if _index is None:
+            return
+        index = _index.copy()
+        index.remove(id_attraction)
+        attraction = Attraction.query.get(id_attraction)
+        if attraction is not None and not attraction.is_delete:
+            index.add(attraction, _lookup_names(
+                attraction,
+                _details(DetailMaterial, "id_material", id_attraction).get(id_attraction, []),
+                _details(DetailTecnique, "id_tecnique", id_attraction).get(id_attraction, []),
+            ))
+        _index = index
+        # Si entre medio solo cambió esta atracción en este worker, el índice
+        # sigue al día; cualquier otro cambio obliga a reconstruirlo.
+        version = _current_version()
+        (old_remote, old_local), (new_remote, new_local) = _version[0], version[0]
+        if version[1:] == _version[1:] and new_local - old_local == 1 and new_remote - old_remote <= 1:
+            _version = version
+
+
+def search(query, limit=20):
+    return get_index().search(query, limit)
@@ -0,0 +1,194 @@
+import atexit
+import contextlib
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+from decouple import config
+from sqlalchemy import insert
+
+from app import app, db
+from models.beacon_sighting import BeaconSighting
+
+try:
+    import fcntl
+except ImportError:  # fcntl no existe en Windows, ahí el lock es solo por proceso
+    fcntl = None
+
+QUEUE_SIZE = config("SIGHTINGS_QUEUE_SIZE", default=10000, cast=int)
+BATCH_SIZE = config("SIGHTINGS_BATCH_SIZE", default=500, cast=int)
+FLUSH_SECONDS = config("SIGHTINGS_FLUSH_SECONDS", default=1.0, cast=float)
+SHUTDOWN_TIMEOUT = config("SIGHTINGS_SHUTDOWN_TIMEOUT", default=10.0, cast=float)
+# Archivo donde se guardan los avistamientos cuando la base de datos no
+# puede recibirlos; se reintenta en cuanto vuelve a responder.
+SPILL_PATH = os.path.abspath(config("SIGHTINGS_SPILL_PATH", default="sightings.spill"))
+SPILL_MAX_BYTES = config("SIGHTINGS_SPILL_MAX_BYTES", default=64 * 1024 * 1024, cast=int)
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_spill_lock = threading.Lock()
+_start_lock = threading.Lock()
+# Lo tiene el hilo mientras arma y guarda un lote, para que el apagado espere
+_batch_lock = threading.Lock()
+_thread = None
+
+
+def _row_to_json(row):
+    return json.dumps({
+        "address": row["address"],
+        "id_attraction": row["id_attraction"],
+        "rssi": row["rssi"],
+        "seen_at": row["seen_at"].isoformat(),
+    })
+
+
+def _row_from_json(line):
+    row = json.loads(line)
+    row["seen_at"] = datetime.datetime.fromisoformat(row["seen_at"])
+    return row
+
+
+@contextlib.contextmanager
+def _locked_spill():
+    """Bloquea el archivo de avistamientos entre hilos y entre workers.
+
+    El lock se toma sobre un archivo aparte porque SPILL_PATH se renombra al
+    reinsertarlo y un flock sobre él dejaría de proteger al archivo nuevo.
+    """
+    with _spill_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(SPILL_PATH + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _spill(rows):
+    """Guarda los avistamientos en disco. Devuelve False si no hay espacio."""
+    with _locked_spill():
+        try:
+            size = os.path.getsize(SPILL_PATH)
+        except OSError:
+            size = 0
+        if size >= SPILL_MAX_BYTES:
+            return False
+        with open(SPILL_PATH, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(_row_to_json(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+
+def _insert(rows):
+    # Un solo INSERT de varias filas por lote
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(BeaconSighting), rows[start:start + BATCH_SIZE])
+    db.session.commit()
+
+
+def _replay_spill():
+    """Reinserta lo que quedó en disco mientras la base de datos falló."""
+    with _locked_spill():
+        if not os.path.exists(SPILL_PATH):
+            return
+        # Un nombre por proceso para que dos workers no se pisen el archivo
+        replay_path = "{}.{}.replay".format(SPILL_PATH, os.getpid())
+        os.replace(SPILL_PATH, replay_path)
+    with open(replay_path, encoding="utf-8") as f:
+        rows = [_row_from_json(line) for line in f if line.strip()]
+    try:
+        _insert(rows)
+    except Exception:
+        db.session.rollback()
+        if not _spill(rows):
+            app.logger.error("Se descartaron %s avistamientos: disco lleno", len(rows))
+        raise
+    finally:
+        os.remove(replay_path)
+
+
+def _flush(rows):
+    with app.app_context():
+        try:
+            _insert(rows)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning("No se pudieron guardar %s avistamientos: %s", len(rows), e)
+            if not _spill(rows):
+                app.logger.error("Se descartaron %s avistamientos: disco lleno", len(rows))
+            return
+        try:
+            _replay_spill()
+        except Exception as e:
+            app.logger.warning("No se pudo reinsertar el archivo de avistamientos: %s", e)
+
+
+def _drain():
+    """Guarda lo que quedó en la cola al apagar el proceso."""
+    # Espera al lote que el hilo tenga en curso antes de vaciar la cola
+    acquired = _batch_lock.acquire(timeout=SHUTDOWN_TIMEOUT)
+    rows = []
+    while True:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    try:
+        if rows:
+            _flush(rows)
+    finally:
+        if acquired:
+            _batch_lock.release()
+
+
+atexit.register(_drain)
+
+
+def _run():
+    while True:
+        rows = [_queue.get()]
+        with _batch_lock:
+            deadline = time.monotonic() + FLUSH_SECONDS
+            while len(rows) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(_queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            _flush(rows)
+
+
+def _ensure_started():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    with _start_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="sightings-flusher", daemon=True)
+            _thread.start()
+
+
+def enqueue(rows):
+    """Encola un lote de avistamientos para guardarlo en segundo plano.
+
+    Si la cola está llena el lote va directo al archivo en disco; devuelve
+    False solo cuando tampoco hay espacio ahí y el cliente debe reintentar.
+    """
+    _ensure_started()
+    if _queue.qsize() + len(rows) > QUEUE_SIZE:
+        return _spill(rows)
+    for position, row in enumerate(rows):
+        try:
+            _queue.put_nowait(row)
+        except queue.Full:
+            return _spill(rows[position:])
+    return True
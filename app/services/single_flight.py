@@ -0,0 +1,152 @@
+"""Coalescencia de cálculos costosos (single-flight).
+
+Cuando varias peticiones necesitan el mismo resultado a la vez solo una lo
+calcula y las demás esperan ese resultado. Con un valor anterior disponible
+se responde con él mientras se recalcula en segundo plano
+(stale-while-revalidate), así que los lectores no se bloquean.
+
+Con SINGLE_FLIGHT_LOCK_DIR configurado, los workers también se coordinan:
+un lock de archivo deja calcular a uno solo y el resultado queda en disco
+para que los demás lo reutilicen. El archivo se identifica con shared_version,
+que debe ser igual en todos los workers para los mismos datos (sin contadores
+propios del proceso); sin ella no se comparte. Hay un solo archivo de resultado por key,
+que se sobrescribe con cada versión nueva. El directorio se crea con permisos
+0700 y solo se leen resultados de él si nadie más puede escribir ahí, porque
+se guardan con pickle.
+"""
+import hashlib
+import os
+import pickle
+import stat
+import threading
+import time
+
+from decouple import config
+from flask import copy_current_request_context, has_request_context
+
+try:
+    import fcntl
+except ImportError:  # fcntl no existe en Windows, ahí el lock es solo por proceso
+    fcntl = None
+
+LOCK_DIR = config("SINGLE_FLIGHT_LOCK_DIR", default="")
+# Antigüedad máxima de un valor viejo que todavía se puede servir
+MAX_STALE_SECONDS = config("SINGLE_FLIGHT_MAX_STALE_SECONDS", default=300, cast=float)
+
+
+def _private_dir(path):
+    """Crea path con permisos 0700 y confirma que solo este usuario escribe ahí."""
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.stat(path)
+    except OSError:
+        return False
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        return False
+    return True
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class _Entry:
+    __slots__ = ("version", "value", "stale_since")
+
+    def __init__(self, version, value):
+        self.version = version
+        self.value = value
+        self.stale_since = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._calls = {}
+
+    def _file_path(self, key, suffix):
+        digest = hashlib.sha1(repr((self.name, key)).encode("utf-8")).hexdigest()
+        return os.path.join(LOCK_DIR, digest + suffix)
+
+    def _compute_shared(self, key, shared_version, compute):
+        """Calcula con lock entre workers y reutiliza el resultado de otro."""
+        if shared_version is None or not LOCK_DIR or fcntl is None or not _private_dir(LOCK_DIR):
+            return compute()
+        result_path = self._file_path(key, ".result")
+        with open(self._file_path(key, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(result_path, "rb") as f:
+                        stored_version, value = pickle.load(f)
+                    if stored_version == shared_version:
+                        return value
+                except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+                    pass
+                value = compute()
+                tmp_path = result_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump((shared_version, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, result_path)
+                return value
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _run(self, key, version, shared_version, compute, call):
+        try:
+            value = self._compute_shared(key, shared_version, compute)
+            with self._lock:
+                self._entries[key] = _Entry(version, value)
+            call.value = value
+        except Exception as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop((key, version), None)
+            call.done.set()
+
+    def get(self, key, version, compute, shared_version=None):
+        """Devuelve el valor de key para version, calculándolo una sola vez.
+
+        shared_version identifica el resultado entre workers, ver el módulo.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                return entry.value
+
+            call = self._calls.get((key, version))
+            leader = call is None
+            if leader:
+                call = self._calls[(key, version)] = _Call()
+
+            if entry is not None:
+                if entry.stale_since is None:
+                    entry.stale_since = time.monotonic()
+                serve_stale = time.monotonic() - entry.stale_since <= MAX_STALE_SECONDS
+            else:
+                serve_stale = False
+
+        if serve_stale:
+            if leader:
+                # Se recalcula en segundo plano con una copia de la petición
+                target = self._run
+                if has_request_context():
+                    target = copy_current_request_context(self._run)
+                threading.Thread(
+                    target=target, args=(key, version, shared_version, compute, call), daemon=True
+                ).start()
+            return entry.value
+
+        if leader:
+            self._run(key, version, shared_version, compute, call)
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.value
@@ -0,0 +1,74 @@
+"""Índice de cuadrícula sobre las coordenadas de las atracciones.
+
+Cada punto se guarda en la celda de SPATIAL_CELL_DEGREES grados que lo
+contiene, así que una consulta por caja solo revisa las celdas que toca.
+El índice se reconstruye cuando cambia la lista de puntos en memoria.
+"""
+import math
+import threading
+
+from decouple import config
+
+from services import nearby
+
+CELL_DEGREES = config("SPATIAL_CELL_DEGREES", default=0.01, cast=float)
+
+
+class GridIndex:
+    def __init__(self, points, cell_degrees=CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        for point in points:
+            self.cells.setdefault(self._cell(point.lat, point.lng), []).append(point)
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def _lng_ranges(self, min_lng, max_lng):
+        # Una caja que cruza el antimeridiano se parte en dos
+        if min_lng > max_lng:
+            return ((min_lng, 180.0), (-180.0, max_lng))
+        return ((min_lng, max_lng),)
+
+    def within(self, min_lat, min_lng, max_lat, max_lng):
+        """Puntos dentro de la caja; min_lng > max_lng cruza el antimeridiano."""
+        result = []
+        for west, east in self._lng_ranges(min_lng, max_lng):
+            row_min, col_min = self._cell(min_lat, west)
+            row_max, col_max = self._cell(max_lat, east)
+            area = (row_max - row_min + 1) * (col_max - col_min + 1)
+            if area <= len(self.cells):
+                cells = (
+                    self.cells.get((row, col))
+                    for row in range(row_min, row_max + 1)
+                    for col in range(col_min, col_max + 1)
+                )
+            else:
+                cells = (
+                    points for (row, col), points in self.cells.items()
+                    if row_min <= row <= row_max and col_min <= col <= col_max
+                )
+            for points in cells:
+                if not points:
+                    continue
+                for point in points:
+                    if min_lat <= point.lat <= max_lat and west <= point.lng <= east:
+                        result.append(point)
+        return result
+
+
+_lock = threading.Lock()
+_index = None
+_index_points = None
+
+
+def get_index():
+    global _index, _index_points
+    points = nearby.get_points()
+    if _index is not None and _index_points is points:
+        return _index
+    with _lock:
+        if _index is None or _index_points is not points:
+            _index = GridIndex(points)
+            _index_points = points
+        return _index
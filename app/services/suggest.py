@@ -0,0 +1,68 @@
+import bisect
+import threading
+
+from services import lookup_cache
+from services.search_index import normalize
+
+
+class Suggester:
+    """Autocompletado sobre una tabla de referencia.
+
+    Guarda un arreglo ordenado con el nombre normalizado a partir de cada
+    palabra ("gian lorenzo bernini", "lorenzo bernini", "bernini"), así un
+    prefijo de cualquier palabra se resuelve con una búsqueda binaria. Se
+    reconstruye cuando el LookupCache recarga la tabla.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._source = None
+        # (claves, entradas) se reemplazan juntas para que un lector nunca
+        # combine las claves de una versión con las entradas de otra
+        self._data = ([], [])
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        rows = self.cache.rows()
+        if rows is self._source:
+            return
+        with self._lock:
+            if rows is self._source:
+                return
+            entries = []
+            for row in rows.values():
+                if row.is_delete or not row.name:
+                    continue
+                words = normalize(row.name).split()
+                for start in range(len(words)):
+                    entries.append((" ".join(words[start:]), start, row.name, row.id))
+            entries.sort()
+            self._data = ([entry[0] for entry in entries], entries)
+            self._source = rows
+
+    def suggest(self, prefix, limit=10):
+        """Devuelve hasta limit registros cuyo nombre tenga una palabra que
+        empiece por prefix, primero los que coinciden desde el inicio."""
+        self._refresh()
+        prefix = " ".join(normalize(prefix).split())
+        if not prefix:
+            return []
+        keys, entries = self._data
+        matches = []
+        seen = set()
+        for i in range(bisect.bisect_left(keys, prefix), len(keys)):
+            if not keys[i].startswith(prefix):
+                break
+            _, start, name, id = entries[i]
+            if id not in seen:
+                seen.add(id)
+                matches.append((start, name, id))
+        matches.sort()
+        return [{"id": id, "name": name} for _, name, id in matches[:max(limit, 0)]]
+
+
+authors = Suggester(lookup_cache.authors)
+styles = Suggester(lookup_cache.styles)
+categories = Suggester(lookup_cache.categories)
+materials = Suggester(lookup_cache.materials)
+tecniques = Suggester(lookup_cache.tecniques)
@@ -0,0 +1,200 @@
+"""Orden de visita para un conjunto de atracciones.
+
+Se construye un recorrido abierto con vecino más cercano desde el punto de
+partida y se mejora con 2-opt y Or-opt sobre la matriz de distancias
+haversine mientras quede tiempo de TOUR_TIME_BUDGET_MS. Los resultados se
+guardan por conjunto de IDs y punto de partida redondeado.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from decouple import config
+
+from services import nearby
+from services.nearby import EARTH_RADIUS_KM
+
+TIME_BUDGET_MS = config("TOUR_TIME_BUDGET_MS", default=50, cast=float)
+CACHE_SIZE = config("TOUR_CACHE_SIZE", default=1000, cast=int)
+# Decimales del punto de partida en la clave de la cache (4 ~ 11 m)
+START_DECIMALS = 4
+# Longitud máxima de los tramos que mueve Or-opt
+_OR_OPT_SEGMENT = 3
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_by_id = None
+_by_id_points = None
+
+
+def distance_matrix(coords):
+    """Matriz de distancias haversine en km entre todas las coordenadas."""
+    # Senos y cosenos se calculan una vez por punto y no por par
+    radians = [(math.radians(lat), math.radians(lng)) for lat, lng in coords]
+    cos_lat = [math.cos(lat) for lat, _ in radians]
+    size = len(coords)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        lat_i, lng_i = radians[i]
+        row = matrix[i]
+        for j in range(i + 1, size):
+            lat_j, lng_j = radians[j]
+            a = (
+                math.sin((lat_j - lat_i) / 2) ** 2
+                + cos_lat[i] * cos_lat[j] * math.sin((lng_j - lng_i) / 2) ** 2
+            )
+            row[j] = matrix[j][i] = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+    return matrix
+
+
+def path_length(matrix, path):
+    return sum(matrix[a][b] for a, b in zip(path, path[1:]))
+
+
+def _nearest_neighbour(matrix, first):
+    path = [0, first]
+    remaining = set(range(1, len(matrix)))
+    remaining.discard(first)
+    while remaining:
+        last = matrix[path[-1]]
+        nearest = min(remaining, key=last.__getitem__)
+        path.append(nearest)
+        remaining.remove(nearest)
+    return path
+
+
+def _two_opt(matrix, path, deadline):
+    """Invierte tramos mientras acorte el recorrido; el nodo 0 queda fijo."""
+    improved = False
+    size = len(path)
+    for i in range(1, size - 1):
+        if time.perf_counter() > deadline:
+            break
+        a, b = path[i - 1], path[i]
+        for j in range(i + 1, size):
+            c = path[j]
+            # El recorrido es abierto: después del último nodo no hay arista
+            if j + 1 < size:
+                e = path[j + 1]
+                delta = matrix[a][c] + matrix[b][e] - matrix[a][b] - matrix[c][e]
+            else:
+                delta = matrix[a][c] - matrix[a][b]
+            if delta < -1e-9:
+                path[i:j + 1] = reversed(path[i:j + 1])
+                improved = True
+                b = path[i]
+    return improved
+
+
+def _or_opt(matrix, path, deadline):
+    """Mueve tramos cortos a la posición donde más acorten el recorrido."""
+    improved = False
+    for length in range(1, _OR_OPT_SEGMENT + 1):
+        i = 1
+        while i + length <= len(path):
+            if time.perf_counter() > deadline:
+                return improved
+            segment = path[i:i + length]
+            prev, first, last = path[i - 1], segment[0], segment[-1]
+            after = path[i + length] if i + length < len(path) else None
+            # Lo que se ahorra al quitar el tramo
+            removed = matrix[prev][first] - (matrix[prev][after] if after is not None else 0.0)
+            if after is not None:
+                removed += matrix[last][after]
+            rest = path[:i] + path[i + length:]
+            best_gain, best_at, best_reversed = 1e-9, None, False
+            for k in range(len(rest)):
+                u = rest[k]
+                v = rest[k + 1] if k + 1 < len(rest) else None
+                # El tramo se puede insertar en su sentido o invertido
+                for head, tail, reverse in ((first, last, False), (last, first, True)):
+                    added = matrix[u][head] + (matrix[tail][v] - matrix[u][v] if v is not None else 0.0)
+                    if removed - added > best_gain:
+                        best_gain, best_at, best_reversed = removed - added, k + 1, reverse
+            if best_at is not None:
+                if best_reversed:
+                    segment.reverse()
+                path[:] = rest[:best_at] + segment + rest[best_at:]
+                improved = True
+            else:
+                i += 1
+    return improved
+
+
+def _improve(matrix, path, deadline):
+    while time.perf_counter() < deadline:
+        improved = _two_opt(matrix, path, deadline)
+        improved = _or_opt(matrix, path, deadline) or improved
+        if not improved:
+            break
+    return path
+
+
+def solve(matrix, time_budget_ms=TIME_BUDGET_MS):
+    """Orden de visita de los nodos 1..n partiendo del nodo 0.
+
+    Con el tiempo que sobra se repite desde otras primeras paradas, de la
+    más cercana a la más lejana, y se queda el recorrido más corto.
+    """
+    if len(matrix) < 2:
+        return [0]
+    deadline = time.perf_counter() + time_budget_ms / 1000
+    firsts = sorted(range(1, len(matrix)), key=matrix[0].__getitem__)
+    best = _improve(matrix, _nearest_neighbour(matrix, firsts[0]), deadline)
+    best_length = path_length(matrix, best)
+    for first in firsts[1:]:
+        if time.perf_counter() >= deadline:
+            break
+        path = _improve(matrix, _nearest_neighbour(matrix, first), deadline)
+        length = path_length(matrix, path)
+        if length < best_length - 1e-9:
+            best, best_length = path, length
+    return best
+
+
+def _points_by_id():
+    global _by_id, _by_id_points
+    points = nearby.get_points()
+    if _by_id_points is not points:
+        _by_id = {point.id: point for point in points}
+        _by_id_points = points
+    return _by_id
+
+
+def plan(ids, start=None):
+    """Ordena las atracciones ids; start es (lat, lng) o None.
+
+    Devuelve (puntos en orden, distancias desde el anterior, IDs faltantes).
+    Sin start el recorrido empieza en la atracción más conveniente.
+    """
+    by_id = _points_by_id()
+    unique_ids = list(dict.fromkeys(ids))
+    points = [by_id[id] for id in unique_ids if id in by_id]
+    found = {point.id for point in points}
+    missing = [id for id in unique_ids if id not in found]
+
+    rounded = tuple(round(value, START_DECIMALS) for value in start) if start is not None else None
+    key = (tuple(sorted(found)), rounded)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] is by_id:
+            _cache.move_to_end(key)
+            return entry[1], entry[2], missing
+
+    coords = [rounded if rounded is not None else (0.0, 0.0)] + [(p.lat, p.lng) for p in points]
+    matrix = distance_matrix(coords)
+    if rounded is None:
+        # Un nodo de partida a distancia cero de todos deja libre el inicio
+        for i in range(len(matrix)):
+            matrix[0][i] = matrix[i][0] = 0.0
+    path = solve(matrix)
+
+    ordered = [points[node - 1] for node in path[1:]]
+    legs = [matrix[a][b] for a, b in zip(path, path[1:])]
+    with _lock:
+        _cache[key] = (by_id, ordered, legs)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return ordered, legs, missing
@@ -0,0 +1,242 @@
+"""Distancia caminando sobre un grafo peatonal.
+
+El grafo se carga de un GeoJSON local (WALKING_GRAPH_PATH) con los caminos
+como LineString o MultiLineString; cada vértice es un nodo y cada tramo una
+arista con su longitud. Las atracciones se proyectan una vez sobre su tramo
+más cercano, así que ordenar por distancia caminando cuesta un Dijkstra
+acotado desde la posición del usuario más una búsqueda en tabla por
+atracción. Las que están lejos de cualquier camino usan la distancia en
+línea recta.
+"""
+import heapq
+import json
+import math
+import os
+import threading
+from collections import namedtuple
+
+from decouple import config
+from flask import current_app
+
+from services.nearby import haversine_km
+
+GRAPH_PATH = config("WALKING_GRAPH_PATH", default="")
+# Más lejos que esto de cualquier camino se usa la distancia en línea recta
+MAX_SNAP_KM = config("WALKING_MAX_SNAP_KM", default=0.3, cast=float)
+# Tamaño en grados de las celdas del índice de nodos
+SNAP_CELL_DEGREES = 0.005
+# Decimales con los que se identifican vértices compartidos entre caminos
+_COORD_DECIMALS = 7
+# Km por grado de latitud, para proyectar sobre un tramo en un plano local
+_KM_PER_DEGREE = 111.32
+
+# Proyección de un punto sobre el tramo a-b: km desde la proyección hasta cada
+# extremo y km del punto a la proyección
+Snap = namedtuple("Snap", ["edge", "a", "b", "to_a", "to_b", "km"])
+
+
+class WalkingGraph:
+    def __init__(self):
+        self.coords = []
+        self.adjacency = []
+        self.edges = []
+        self._ids = {}
+        self._cells = {}
+
+    def _node(self, lng, lat):
+        key = (round(lat, _COORD_DECIMALS), round(lng, _COORD_DECIMALS))
+        node = self._ids.get(key)
+        if node is None:
+            node = self._ids[key] = len(self.coords)
+            self.coords.append(key)
+            self.adjacency.append([])
+        return node
+
+    def _add_edge(self, a, b):
+        km = haversine_km(*self.coords[a], *self.coords[b])
+        self.adjacency[a].append((b, km))
+        self.adjacency[b].append((a, km))
+        edge = len(self.edges)
+        self.edges.append((a, b, km))
+        # El tramo queda en todas las celdas que cubre su rectángulo
+        (row_a, col_a), (row_b, col_b) = self._cell(*self.coords[a]), self._cell(*self.coords[b])
+        for row in range(min(row_a, row_b), max(row_a, row_b) + 1):
+            for col in range(min(col_a, col_b), max(col_a, col_b) + 1):
+                self._cells.setdefault((row, col), []).append(edge)
+
+    def add_path(self, coordinates):
+        previous = None
+        for position in coordinates:
+            node = self._node(float(position[0]), float(position[1]))
+            if previous is not None and previous != node:
+                self._add_edge(previous, node)
+            previous = node
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        graph = cls()
+        features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "LineString":
+                graph.add_path(geometry["coordinates"])
+            elif geometry.get("type") == "MultiLineString":
+                for line in geometry["coordinates"]:
+                    graph.add_path(line)
+        return graph
+
+    @staticmethod
+    def _cell(lat, lng):
+        return (math.floor(lat / SNAP_CELL_DEGREES), math.floor(lng / SNAP_CELL_DEGREES))
+
+    def _project(self, edge, lat, lng):
+        a, b, edge_km = self.edges[edge]
+        lat_a, lng_a = self.coords[a]
+        lat_b, lng_b = self.coords[b]
+        # Plano local alrededor del punto; basta para tramos de unos cientos de metros
+        scale = math.cos(math.radians(lat))
+        dx, dy = (lng_b - lng_a) * scale, lat_b - lat_a
+        length = dx * dx + dy * dy
+        t = 0.0
+        if length > 0:
+            t = ((lng - lng_a) * scale * dx + (lat - lat_a) * dy) / length
+            t = min(1.0, max(0.0, t))
+        km = haversine_km(lat, lng, lat_a + t * (lat_b - lat_a), lng_a + t * (lng_b - lng_a))
+        return Snap(edge, a, b, edge_km * t, edge_km * (1 - t), km)
+
+    def snap(self, lat, lng, max_km=MAX_SNAP_KM):
+        """Proyección sobre el tramo más cercano a menos de max_km, o None."""
+        row, col = self._cell(lat, lng)
+        # Celdas necesarias para cubrir max_km en latitud y en longitud
+        cell_km = SNAP_CELL_DEGREES * _KM_PER_DEGREE
+        rings_lat = int(max_km / cell_km) + 1
+        rings_lng = int(max_km / (cell_km * max(math.cos(math.radians(lat)), 0.01))) + 1
+        seen = set()
+        best = None
+        for d_row in range(-rings_lat, rings_lat + 1):
+            for d_col in range(-rings_lng, rings_lng + 1):
+                for edge in self._cells.get((row + d_row, col + d_col), ()):
+                    if edge in seen:
+                        continue
+                    seen.add(edge)
+                    snap = self._project(edge, lat, lng)
+                    if snap.km <= max_km and (best is None or snap.km < best.km):
+                        best = snap
+        return best
+
+    def shortest(self, sources, max_km, targets=None):
+        """Distancias a los nodos alcanzables en max_km o menos.
+
+        sources es un diccionario nodo -> km con que arranca la búsqueda. Con
+        targets la búsqueda termina en cuanto se fijan todos esos nodos.
+        """
+        distances = dict(sources)
+        heap = [(km, node) for node, km in distances.items()]
+        heapq.heapify(heap)
+        pending = set(targets) if targets is not None else None
+        while heap:
+            km, node = heapq.heappop(heap)
+            if km > distances[node]:
+                continue
+            if pending is not None:
+                pending.discard(node)
+                if not pending:
+                    break
+            for neighbour, edge_km in self.adjacency[node]:
+                total = km + edge_km
+                if total <= max_km and total < distances.get(neighbour, math.inf):
+                    distances[neighbour] = total
+                    heapq.heappush(heap, (total, neighbour))
+        return distances
+
+
+_lock = threading.Lock()
+_graph = None
+_graph_mtime = None
+_snapped = {}
+_snapped_key = None
+
+
+def get_graph():
+    """Devuelve el grafo configurado o None si no hay uno disponible."""
+    global _graph, _graph_mtime
+    if not GRAPH_PATH:
+        return None
+    try:
+        mtime = os.stat(GRAPH_PATH).st_mtime_ns
+    except OSError:
+        return None
+    if _graph is not None and _graph_mtime == mtime:
+        return _graph
+    with _lock:
+        if _graph is None or _graph_mtime != mtime:
+            try:
+                _graph = WalkingGraph.from_geojson(GRAPH_PATH)
+            except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+                current_app.logger.warning("No se pudo cargar el grafo peatonal: %s", e)
+                _graph = None
+            _graph_mtime = mtime
+        return _graph
+
+
+def _snap_points(graph, points):
+    """Tabla ID de atracción -> Snap, calculada una vez por versión."""
+    global _snapped, _snapped_key
+    def current():
+        return _snapped_key is not None and _snapped_key[0] is graph and _snapped_key[1] is points
+
+    if current():
+        return _snapped
+    with _lock:
+        if not current():
+            snapped = {}
+            for point in points:
+                snap = graph.snap(point.lat, point.lng)
+                if snap is not None:
+                    snapped[point.id] = snap
+            _snapped = snapped
+            _snapped_key = (graph, points)
+        return _snapped
+
+
+def distances(lat, lng, points, max_km, all_points):
+    """Distancia caminando en km desde (lat, lng) a cada punto alcanzable.
+
+    points son los candidatos y all_points la lista completa de la que salen.
+    Devuelve un diccionario ID -> km sin los puntos a más de max_km, o None
+    si no hay grafo o el usuario está lejos de cualquier camino. Los puntos
+    lejos de cualquier camino usan la distancia en línea recta.
+    """
+    graph = get_graph()
+    if graph is None:
+        return None
+    source = graph.snap(lat, lng)
+    if source is None:
+        return None
+    snapped = _snap_points(graph, all_points)
+    starts = {source.a: source.km + source.to_a}
+    starts[source.b] = min(starts.get(source.b, math.inf), source.km + source.to_b)
+    targets = set()
+    for point in points:
+        snap = snapped.get(point.id)
+        if snap is not None:
+            targets.update((snap.a, snap.b))
+    reached = graph.shortest(starts, max_km, targets)
+    result = {}
+    for point in points:
+        snap = snapped.get(point.id)
+        if snap is None:
+            km = haversine_km(lat, lng, point.lat, point.lng)
+        else:
+            km = snap.km + min(
+                reached.get(snap.a, math.inf) + snap.to_a,
+                reached.get(snap.b, math.inf) + snap.to_b,
+            )
+            if snap.edge == source.edge:
+                # Sobre el mismo tramo se camina directo sin pasar por los extremos
+                km = min(km, source.km + abs(snap.to_a - source.to_a) + snap.km)
+        if km <= max_km:
+            result[point.id] = km
+    return result
@@ -0,0 +1,155 @@
+"""Precalentamiento de las caches del catálogo.
+
+Al recibir la primera petición (normalmente la sonda del balanceador) el
+worker arranca un hilo que construye las tablas de referencia, los índices
+en memoria y las respuestas precomprimidas del catálogo. /health/ready
+responde 503 hasta que quedan construidas las tablas de referencia y los
+puntos de nearby; si falla el resto de la pasada (un índice o la respuesta de
+una categoría con datos rotos) solo se registra, para que una fila mala no
+deje a todos los workers fuera del balanceador. Después de cada escritura en
+los blueprints del catálogo se vuelve a calentar en segundo plano.
+"""
+import threading
+import time
+
+from decouple import config
+from flask import request
+
+from services import lookup_cache
+from services import nearby
+from services import search_index
+from services import facets
+from services import clusters
+from services import spatial_index
+
+ENABLED = config("WARMUP_ENABLED", default=True, cast=bool)
+# Espera tras una escritura para agrupar ráfagas de cambios en una pasada
+DEBOUNCE_SECONDS = config("WARMUP_DEBOUNCE_SECONDS", default=1, cast=float)
+RETRY_SECONDS = config("WARMUP_RETRY_SECONDS", default=10, cast=float)
+
+# Blueprints cuyas escrituras cambian el catálogo
+BLUEPRINTS = ("attraction", "category", "author", "style", "material", "tecnique")
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Marca en el environ de las peticiones internas del precalentamiento
+ENVIRON_KEY = "catalog.warmup"
+
+_ready = threading.Event()
+_dirty = threading.Event()
+_start_lock = threading.Lock()
+_thread = None
+_warmers = []
+
+
+def register(warmer):
+    """Agrega una función sin argumentos que se llama en cada pasada."""
+    _warmers.append(warmer)
+    return warmer
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def schedule():
+    """Pide una nueva pasada en segundo plano."""
+    _dirty.set()
+
+
+def _paths():
+    paths = ["/attraction/GetAllAttractions", "/attraction/GetAllCategories"]
+    for category in lookup_cache.categories.all():
+        paths.append("/attraction/GetAttractionsByCategory/%s" % category.id)
+        paths.append("/attraction/GetAttractionsByCategoryFull/%s" % category.id)
+    return paths
+
+
+def _warm_core(app):
+    """Lo indispensable para atender peticiones; si falla se reintenta."""
+    with app.app_context():
+        for cache in (
+            lookup_cache.authors,
+            lookup_cache.styles,
+            lookup_cache.categories,
+            lookup_cache.materials,
+            lookup_cache.tecniques,
+        ):
+            cache.rows()
+        nearby.get_points()
+
+
+def _warm_rest(app):
+    """Índices y respuestas precomprimidas; cada falla se registra y se sigue."""
+    steps = [
+        search_index.get_index,
+        facets.get_index,
+        clusters.get_index,
+        spatial_index.get_index,
+    ] + _warmers
+    with app.app_context():
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                app.logger.warning("No se pudo precalentar %s: %s", getattr(step, "__qualname__", step), e)
+        paths = _paths()
+
+    # Las respuestas se generan con el mismo flujo que una petición real
+    for path in paths:
+        with app.test_request_context(
+            path, headers={"Accept-Encoding": "br, gzip"}, environ_base={ENVIRON_KEY: True}
+        ):
+            try:
+                response = app.full_dispatch_request()
+            except Exception as e:
+                app.logger.warning("No se pudo precalentar %s: %s", path, e)
+                continue
+            if response.status_code >= 500:
+                app.logger.warning("No se pudo precalentar %s: respondió %s", path, response.status_code)
+
+
+def _run(app):
+    while True:
+        started = time.monotonic()
+        try:
+            _warm_core(app)
+        except Exception as e:
+            app.logger.warning("No se pudo precalentar el catálogo: %s", e)
+            time.sleep(RETRY_SECONDS)
+            continue
+        _warm_rest(app)
+        if not _ready.is_set():
+            app.logger.info("Catálogo precalentado en %.2f s", time.monotonic() - started)
+            _ready.set()
+        _dirty.wait()
+        time.sleep(DEBOUNCE_SECONDS)
+        _dirty.clear()
+
+
+def _ensure_started(app):
+    global _thread
+    if _thread is not None:
+        return
+    with _start_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(app,), name="catalog-warmup", daemon=True)
+            _thread.start()
+
+
+def init_app(app):
+    if not ENABLED:
+        _ready.set()
+        return
+
+    @app.before_request
+    def start_warmup():
+        _ensure_started(app)
+
+    @app.after_request
+    def warm_after_write(response):
+        if (
+            request.blueprint in BLUEPRINTS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            schedule()
+        return response
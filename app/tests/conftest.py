@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+
+# La configuración se lee al importar la app, así que se fija antes
+DATA_DIR = tempfile.mkdtemp(prefix="app-tests-")
+PRIMARY_PATH = os.path.join(DATA_DIR, "primary.sqlite")
+REPLICA_PATH = os.path.join(DATA_DIR, "replica.sqlite")
+
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + PRIMARY_PATH
+os.environ["SQLALCHEMY_REPLICA_URIS"] = "sqlite:///" + REPLICA_PATH
+os.environ["SECRET_KEY"] = "tests-secret-key-with-at-least-32-bytes"
+os.environ["DB_STICKY_SECONDS"] = "60"
+os.environ["CACHE_VERSION_POLL_SECONDS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "False"
+os.environ["WARMUP_ENABLED"] = "False"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+
+import jwt
+import pytest
+
+from tests.conftest import PRIMARY_PATH, REPLICA_PATH
+from app import app, db, SECRET_KEY
+from models.cache_version import CacheVersion
+from models.style import Style
+from services import db_routing
+from services import lookup_cache
+
+AUTH = {"Authorization": "Bearer " + jwt.encode({"email": "tests@example.com"}, SECRET_KEY, algorithm="HS256")}
+
+
+@pytest.fixture
+def databases():
+    """Primario y réplica en archivos SQLite; la réplica tiene un nombre atrasado."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Style(id=1, name="Barroco", is_delete=False))
+        db.session.add(CacheVersion(name="style", version=1))
+        db.session.commit()
+        db.session.remove()
+    for replica in db_routing.replicas.replicas:
+        replica.engine.dispose()
+    shutil.copy(PRIMARY_PATH, REPLICA_PATH)
+    with sqlite3.connect(REPLICA_PATH) as connection:
+        connection.execute("UPDATE style SET name = 'Atrasado'")
+    for replica in db_routing.replicas.replicas:
+        replica.healthy = True
+    with db_routing._sticky_lock:
+        db_routing._sticky_until.clear()
+    yield
+
+
+def _names(response):
+    return [style["name"] for style in response.get_json()]
+
+
+def test_get_reads_from_replica(databases):
+    response = app.test_client().get("/style/", headers=AUTH)
+    assert response.status_code == 200
+    assert _names(response) == ["Atrasado"]
+
+
+def test_unhealthy_replica_falls_back_to_primary(databases):
+    db_routing.replicas.replicas[0].healthy = False
+    response = app.test_client().get("/style/", headers=AUTH)
+    assert _names(response) == ["Barroco"]
+
+
+def test_reads_after_write_stick_to_primary(databases):
+    client = app.test_client()
+    response = client.post("/style/", headers=AUTH, json={"name": "Nuevo"})
+    assert response.status_code < 400
+    names = _names(client.get("/style/", headers=AUTH))
+    assert "Nuevo" in names and "Barroco" in names
+
+
+def test_cache_loaders_read_from_primary(databases):
+    with app.test_request_context("/style/", method="GET", headers=AUTH):
+        app.preprocess_request()
+        from flask import g
+        assert g.db_route == "replica"
+        # Una consulta normal va a la réplica...
+        assert Style.query.get(1).name == "Atrasado"
+        db.session.expunge_all()
+        # ...pero las caches se llenan desde el primario
+        assert lookup_cache.styles.get(1).name == "Barroco"
+        assert g.db_route == "replica"
+
+
+def test_read_only_post_does_not_stick_to_primary(databases):
+    client = app.test_client()
+    response = client.post("/attraction/batch", json={"ids": [1]})
+    assert response.status_code == 200
+    assert db_routing.STICKY_COOKIE not in response.headers.get("Set-Cookie", "")
+    assert _names(client.get("/style/", headers=AUTH)) == ["Atrasado"]
+
+
+def test_failed_replica_query_retries_on_primary(databases):
+    with sqlite3.connect(REPLICA_PATH) as connection:
+        connection.execute("DROP TABLE style")
+    response = app.test_client().get("/style/", headers=AUTH)
+    assert response.status_code == 200
+    assert _names(response) == ["Barroco"]
+    assert not db_routing.replicas.replicas[0].healthy